@@ -1,3 +1,3 @@
 from __future__ import annotations
 
-__all__ = ["router"]
+__all__ = ["deps", "router"]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+from fastapi import FastAPI, Request
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    from app.services.dataset_service import DatasetService
+    from app.services.insights_service import InsightsService
+    from app.services.llm_service import LLMService
+    from app.services.prediction_service import PredictionService
+    from app.services.schema_service import SchemaService
+    from app.services.training_service import TrainingService
+    from app.storage.dataset_store import DatasetStore
+    from app.storage.metadata_store import MetadataStore
+    from app.storage.model_store import ModelStore
+
+# Services and stores are built on first use and cached on app.state. Service modules
+# (pandas/scikit-learn/xgboost) are imported inside the builders, so a cold worker can
+# answer /health without paying for the ML stack.
+_BUILD_LOCK = threading.RLock()
+
+
+def _get_or_build(app: FastAPI, name: str, build: Callable[[FastAPI], Any]) -> Any:
+    obj = getattr(app.state, name, None)
+    if obj is None:
+        with _BUILD_LOCK:
+            obj = getattr(app.state, name, None)
+            if obj is None:
+                obj = build(app)
+                setattr(app.state, name, obj)
+    return obj
+
+
+# ---- Stores ----
+def _build_dataset_store(app: FastAPI) -> DatasetStore:
+    from app.storage.dataset_store import DatasetStore
+
+    return DatasetStore(settings=get_settings())
+
+
+def _build_metadata_store(app: FastAPI) -> MetadataStore:
+    from app.storage.metadata_store import MetadataStore
+
+    return MetadataStore(settings=get_settings())
+
+
+def _build_model_store(app: FastAPI) -> ModelStore:
+    from app.storage.model_store import ModelStore
+
+    return ModelStore(settings=get_settings())
+
+
+def _dataset_store(app: FastAPI) -> DatasetStore:
+    return _get_or_build(app, "dataset_store", _build_dataset_store)
+
+
+def _metadata_store(app: FastAPI) -> MetadataStore:
+    return _get_or_build(app, "metadata_store", _build_metadata_store)
+
+
+def _model_store(app: FastAPI) -> ModelStore:
+    return _get_or_build(app, "model_store", _build_model_store)
+
+
+def _build_predict_pool(app: FastAPI) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=max(1, min(os.cpu_count() or 1, get_settings().predict_max_workers)),
+        thread_name_prefix="predict",
+    )
+
+
+# ---- Services ----
+def _build_llm_service(app: FastAPI) -> LLMService:
+    from app.services.llm_service import LLMService
+
+    return LLMService(settings=get_settings())
+
+
+def _llm_service(app: FastAPI) -> LLMService:
+    return _get_or_build(app, "llm_service", _build_llm_service)
+
+
+def _build_dataset_service(app: FastAPI) -> DatasetService:
+    from app.services.dataset_service import DatasetService
+
+    return DatasetService(
+        settings=get_settings(),
+        dataset_store=_dataset_store(app),
+        metadata_store=_metadata_store(app),
+    )
+
+
+def _build_insights_service(app: FastAPI) -> InsightsService:
+    from app.services.insights_service import InsightsService
+
+    return InsightsService(
+        settings=get_settings(),
+        dataset_store=_dataset_store(app),
+        metadata_store=_metadata_store(app),
+        model_store=_model_store(app),
+        llm_service=_llm_service(app),
+    )
+
+
+def _insights_service(app: FastAPI) -> InsightsService:
+    return _get_or_build(app, "insights_service", _build_insights_service)
+
+
+def _build_training_service(app: FastAPI) -> TrainingService:
+    from app.services.training_service import TrainingService
+
+    return TrainingService(
+        settings=get_settings(),
+        dataset_store=_dataset_store(app),
+        model_store=_model_store(app),
+        metadata_store=_metadata_store(app),
+        insights_service=_insights_service(app),
+    )
+
+
+def _build_prediction_service(app: FastAPI) -> PredictionService:
+    from app.services.prediction_service import PredictionService
+
+    return PredictionService(
+        settings=get_settings(),
+        dataset_store=_dataset_store(app),
+        model_store=_model_store(app),
+        metadata_store=_metadata_store(app),
+        llm_service=_llm_service(app),
+        executor=_get_or_build(app, "predict_pool", _build_predict_pool),
+    )
+
+
+def _build_schema_service(app: FastAPI) -> SchemaService:
+    from app.services.schema_service import SchemaService
+
+    return SchemaService(settings=get_settings(), metadata_store=_metadata_store(app))
+
+
+def get_dataset_service(request: Request) -> DatasetService:
+    return _get_or_build(request.app, "dataset_service", _build_dataset_service)
+
+
+def get_insights_service(request: Request) -> InsightsService:
+    return _insights_service(request.app)
+
+
+def get_training_service(request: Request) -> TrainingService:
+    return _get_or_build(request.app, "training_service", _build_training_service)
+
+
+def get_prediction_service(request: Request) -> PredictionService:
+    return _get_or_build(request.app, "prediction_service", _build_prediction_service)
+
+
+def get_schema_service(request: Request) -> SchemaService:
+    return _get_or_build(request.app, "schema_service", _build_schema_service)
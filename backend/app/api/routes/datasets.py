@@ -1,27 +1,32 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from fastapi import APIRouter, Depends, File, UploadFile
 from starlette import status
 
 from app.core.config import Settings, get_settings
 from app.core.errors import AppError
-from app.services.dataset_service import DatasetService
-from app.services.insights_service import InsightsService
-from app.storage.dataset_store import DatasetStore
-from app.storage.metadata_store import MetadataStore
-from app.storage.model_store import ModelStore
+from app.api.deps import get_dataset_service, get_insights_service
 from app.schemas.datasets import DatasetInfo, PreprocessRequest, PreprocessResponse
 from app.schemas.insights import DatasetSummaryResponse
 
+if TYPE_CHECKING:
+    from app.services.dataset_service import DatasetService
+    from app.services.insights_service import InsightsService
+
 router = APIRouter()
 
+_ALLOWED_EXT = frozenset({"csv", "json"})
+
 
 def _validate_upload_file(file: UploadFile, settings: Settings) -> None:
     if not file or not file.filename:
         raise AppError("No file uploaded", status_code=status.HTTP_400_BAD_REQUEST, code="file_missing")
 
-    filename = file.filename.lower().strip()
-    if not (filename.endswith(".csv") or filename.endswith(".json")):
+    # Same rule as DatasetStore.save_upload: the stripped, lowercased name ends in .csv/.json
+    _, dot, ext = file.filename.strip().lower().rpartition(".")
+    if not dot or ext not in _ALLOWED_EXT:
         raise AppError(
             "Unsupported file type. Please upload a .csv or .json file.",
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -33,24 +38,6 @@ def _validate_upload_file(file: UploadFile, settings: Settings) -> None:
     # This avoids loading the entire file into memory.
 
 
-def get_dataset_service(settings: Settings = Depends(get_settings)) -> DatasetService:
-    dataset_store = DatasetStore(settings=settings)
-    metadata_store = MetadataStore(settings=settings)
-    return DatasetService(settings=settings, dataset_store=dataset_store, metadata_store=metadata_store)
-
-
-def get_insights_service(settings: Settings = Depends(get_settings)) -> InsightsService:
-    dataset_store = DatasetStore(settings=settings)
-    metadata_store = MetadataStore(settings=settings)
-    model_store = ModelStore(settings=settings)
-    return InsightsService(
-        settings=settings,
-        dataset_store=dataset_store,
-        metadata_store=metadata_store,
-        model_store=model_store,
-    )
-
-
 @router.post("/upload", response_model=DatasetInfo)
 async def upload_dataset(
     file: UploadFile = File(...),
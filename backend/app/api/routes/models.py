@@ -1,63 +1,36 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import threading
-from typing import Any, Dict, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
 
-from app.core.config import Settings, get_settings
 from app.core.errors import AppError
 from app.core.logging import get_logger
-from app.services.prediction_service import PredictionService
-from app.services.insights_service import InsightsService
-from app.services.schema_service import SchemaService
-from app.services.training_service import TrainingService
-from app.storage.dataset_store import DatasetStore
-from app.storage.metadata_store import MetadataStore
-from app.storage.model_store import ModelStore
+from app.api.deps import (
+    get_insights_service,
+    get_prediction_service,
+    get_schema_service,
+    get_training_service,
+)
 from app.schemas.datasets import SchemaResponse
 from app.schemas.prediction import PredictRequest, PredictResponse
 from app.schemas.insights import TrainingSummaryResponse
 from app.schemas.training import TrainRequest, TrainResponse
 
+if TYPE_CHECKING:
+    from app.services.insights_service import InsightsService
+    from app.services.prediction_service import PredictionService
+    from app.services.schema_service import SchemaService
+    from app.services.training_service import TrainingService
+
 router = APIRouter()
 logger = get_logger(__name__)
 
 
-def get_training_service(settings: Settings = Depends(get_settings)) -> TrainingService:
-    dataset_store = DatasetStore(settings=settings)
-    model_store = ModelStore(settings=settings)
-    metadata_store = MetadataStore(settings=settings)
-    return TrainingService(settings=settings, dataset_store=dataset_store, model_store=model_store, metadata_store=metadata_store)
-
-
-def get_prediction_service(settings: Settings = Depends(get_settings)) -> PredictionService:
-    dataset_store = DatasetStore(settings=settings)
-    model_store = ModelStore(settings=settings)
-    metadata_store = MetadataStore(settings=settings)
-    return PredictionService(settings=settings, dataset_store=dataset_store, model_store=model_store, metadata_store=metadata_store)
-
-
-def get_schema_service(settings: Settings = Depends(get_settings)) -> SchemaService:
-    metadata_store = MetadataStore(settings=settings)
-    return SchemaService(settings=settings, metadata_store=metadata_store)
-
-
-def get_insights_service(settings: Settings = Depends(get_settings)) -> InsightsService:
-    dataset_store = DatasetStore(settings=settings)
-    model_store = ModelStore(settings=settings)
-    metadata_store = MetadataStore(settings=settings)
-    return InsightsService(
-        settings=settings,
-        dataset_store=dataset_store,
-        model_store=model_store,
-        metadata_store=metadata_store,
-    )
-
-
 @router.post("/train", response_model=TrainResponse)
 async def train_model(
     request: TrainRequest,
@@ -74,13 +47,65 @@ async def train_model(
     return await svc.train_model(request)
 
 
-def _sse_event(event: str, data: Dict[str, Any]) -> str:
-    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+# Keeps GZipMiddleware from buffering/compressing event streams
+_SSE_HEADERS = {"Content-Encoding": "identity"}
+
+# Bounded so a slow SSE client cannot grow the progress backlog without limit
+_STREAM_QUEUE_SIZE = 256
+# Max events coalesced into one streamed chunk
+_SSE_BATCH = 16
+
+
+def _offer(queue: asyncio.Queue, item: Tuple[str, Dict[str, Any]], *, force: bool = False) -> None:
+    """
+    Enqueue an event on the loop thread. Progress ticks are dropped when the queue is full;
+    terminal events (force=True) evict the oldest tick so they are never lost.
+    """
+    if queue.full():
+        if not force:
+            return
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+# Pre-encoded SSE framing; only the payload is serialized per event.
+_EVT_MAP: Dict[str, bytes] = {
+    "progress": b"event: progress\ndata: ",
+    "token": b"event: token\ndata: ",
+    "complete": b"event: complete\ndata: ",
+    "error": b"event: error\ndata: ",
+}
+_NL = b"\n\n"
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    # Bytes go straight to StreamingResponse (no str -> utf-8 encode per event)
+    return _EVT_MAP[event] + orjson.dumps(data) + _NL
+
+
+async def _event_stream(queue: asyncio.Queue):
+    """
+    Yield SSE frames until the "done" sentinel. After one blocking get, whatever is
+    already queued (up to _SSE_BATCH events) is drained and sent as a single chunk.
+    """
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < _SSE_BATCH:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        out = b"".join(_sse_event(event, payload) for event, payload in batch if event != "done")
+        if out:
+            yield out
+        if any(event == "done" for event, _ in batch):
+            break
 
 
 @router.post("/train/stream")
 async def train_model_stream(
     request: TrainRequest,
+    http_request: Request,
     svc: TrainingService = Depends(get_training_service),
 ):
     """
@@ -90,11 +115,11 @@ async def train_model_stream(
       - complete: TrainResponse payload
       - error: { message, code?, details? }
     """
-    queue: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue()
+    queue: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
     loop = asyncio.get_running_loop()
 
     def emit_progress(pct: int, message: str) -> None:
-        loop.call_soon_threadsafe(queue.put_nowait, ("progress", {"pct": pct, "message": message}))
+        loop.call_soon_threadsafe(_offer, queue, ("progress", {"pct": pct, "message": message}))
 
     def run_training() -> None:
         try:
@@ -105,26 +130,19 @@ async def train_model_stream(
                 extra={"code": exc.code, "details": exc.details},
             )
             payload = {"message": exc.message, "code": exc.code, "details": exc.details}
-            loop.call_soon_threadsafe(queue.put_nowait, ("error", payload))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("error", payload), force=True))
         except Exception as exc:
             logger.exception("training_stream_failed")
             payload = {"message": str(exc) or "Training failed"}
-            loop.call_soon_threadsafe(queue.put_nowait, ("error", payload))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("error", payload), force=True))
         else:
-            loop.call_soon_threadsafe(queue.put_nowait, ("complete", result.model_dump()))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("complete", result.model_dump()), force=True))
         finally:
-            loop.call_soon_threadsafe(queue.put_nowait, ("done", {}))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("done", {}), force=True))
 
-    threading.Thread(target=run_training, daemon=True).start()
-
-    async def event_stream():
-        while True:
-            event, payload = await queue.get()
-            if event == "done":
-                break
-            yield _sse_event(event, payload)
+    http_request.app.state.stream_pool.submit(run_training)
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(_event_stream(queue), media_type="text/event-stream", headers=_SSE_HEADERS)
 
 
 @router.get("/schema/{model_id}", response_model=SchemaResponse)
@@ -170,47 +188,46 @@ async def predict(
 @router.post("/predict/stream")
 async def predict_stream(
     request: PredictRequest,
+    http_request: Request,
     svc: PredictionService = Depends(get_prediction_service),
 ):
     """
     Stream prediction progress via Server-Sent Events (SSE).
     Events:
       - progress: { pct, message }
+      - token: { text } (explanation summary text as the LLM generates it; best effort,
+        the complete event carries the final summary)
       - complete: PredictResponse payload
       - error: { message, code?, details? }
     """
-    queue: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue()
+    queue: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
     loop = asyncio.get_running_loop()
 
     def emit_progress(pct: int, message: str) -> None:
-        loop.call_soon_threadsafe(queue.put_nowait, ("progress", {"pct": pct, "message": message}))
+        loop.call_soon_threadsafe(_offer, queue, ("progress", {"pct": pct, "message": message}))
+
+    def emit_token(text: str) -> None:
+        loop.call_soon_threadsafe(_offer, queue, ("token", {"text": text}))
 
     def run_prediction() -> None:
         try:
-            result = svc.predict_with_progress(request, emit_progress)
+            result = svc.predict_with_progress(request, emit_progress, emit_token)
         except AppError as exc:
             logger.warning(
                 "prediction_stream_app_error",
                 extra={"code": exc.code, "details": exc.details},
             )
             payload = {"message": exc.message, "code": exc.code, "details": exc.details}
-            loop.call_soon_threadsafe(queue.put_nowait, ("error", payload))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("error", payload), force=True))
         except Exception as exc:
             logger.exception("prediction_stream_failed")
             payload = {"message": str(exc) or "Prediction failed"}
-            loop.call_soon_threadsafe(queue.put_nowait, ("error", payload))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("error", payload), force=True))
         else:
-            loop.call_soon_threadsafe(queue.put_nowait, ("complete", result.model_dump()))
+            loop.call_soon_threadsafe(partial(_offer, queue, ("complete", result.model_dump()), force=True))
         finally:
-            loop.call_soon_threadsafe(queue.put_nowait, ("done", {}))
-
-    threading.Thread(target=run_prediction, daemon=True).start()
+            loop.call_soon_threadsafe(partial(_offer, queue, ("done", {}), force=True))
 
-    async def event_stream():
-        while True:
-            event, payload = await queue.get()
-            if event == "done":
-                break
-            yield _sse_event(event, payload)
+    http_request.app.state.stream_pool.submit(run_prediction)
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(_event_stream(queue), media_type="text/event-stream", headers=_SSE_HEADERS)
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 
 from app.core.config import get_settings
 from app.schemas.common import HealthResponse, MessageResponse
 
 router = APIRouter()
 
+# Both payloads are static for the process lifetime (settings are cached), so they are
+# encoded once; liveness probes then skip model construction and JSON encoding.
+_settings = get_settings()
+_ROOT_BYTES = orjson.dumps(MessageResponse(message="Churn Prediction Backend is running").model_dump())
+_HEALTH_BYTES = orjson.dumps(
+    HealthResponse(status="ok", environment=_settings.environment, version=_settings.app_version).model_dump()
+)
+
 
 @router.get("/", response_model=MessageResponse)
-def root() -> MessageResponse:
-    return MessageResponse(message="Churn Prediction Backend is running")
+def root() -> Response:
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @router.get("/health", response_model=HealthResponse)
-def health() -> HealthResponse:
-    settings = get_settings()
-    return HealthResponse(status="ok", environment=settings.environment, version=settings.app_version)
+def health() -> Response:
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
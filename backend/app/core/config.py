@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from functools import lru_cache
+import re
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Optional, Sequence, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# Separators for list-valued env vars: commas, whitespace, brackets and quotes.
+_SPLIT_RE = re.compile(r"[\s,\[\]\"']+")
+
+
 def _parse_list(value: Union[str, Sequence[str], None]) -> List[str]:
     """
     Accepts:
@@ -19,21 +24,11 @@ def _parse_list(value: Union[str, Sequence[str], None]) -> List[str]:
     if value is None:
         return []
     if isinstance(value, (list, tuple)):
+        if all(isinstance(v, str) for v in value):
+            return [v.strip() for v in value if v.strip()]
         return [str(v).strip() for v in value if str(v).strip()]
-    s = str(value).strip()
-    if not s:
-        return []
-    # Handle a simple JSON-ish list string without adding a new dependency
-    if s.startswith("[") and s.endswith("]"):
-        s_inner = s[1:-1].strip()
-        if not s_inner:
-            return []
-        # split on commas and strip quotes/spaces
-        parts = [p.strip().strip('"').strip("'") for p in s_inner.split(",")]
-        return [p for p in parts if p]
-    # Comma-separated
-    parts = [p.strip() for p in s.split(",")]
-    return [p for p in parts if p]
+    # Single tokenizing pass handles both comma-separated and JSON-ish list strings
+    return [p for p in _SPLIT_RE.split(str(value)) if p]
 
 
 class Settings(BaseSettings):
@@ -85,6 +80,12 @@ class Settings(BaseSettings):
     # ML defaults
     random_seed: int = Field(default=42, alias="RANDOM_SEED")
     test_size: float = Field(default=0.2, alias="TEST_SIZE")
+    xgb_n_jobs: Optional[int] = Field(default=None, alias="XGB_N_JOBS")  # None -> min(8, cpu count)
+    xgb_device: str = Field(default="cpu", alias="XGB_DEVICE")  # cpu|cuda
+    xgb_early_stopping_rounds: Optional[int] = Field(default=None, alias="XGB_EARLY_STOPPING_ROUNDS")
+    predict_batch_ms: float = Field(default=5.0, alias="PREDICT_BATCH_MS")  # 0 disables /predict batching
+    predict_max_workers: int = Field(default=4, alias="PREDICT_MAX_WORKERS")  # capped at CPU count
+    predict_device: str = Field(default="cpu", alias="PREDICT_DEVICE")  # cpu|cuda, batched /predict only
 
     # LLM (Ollama)
     llm_enabled: bool = Field(default=True, alias="LLM_ENABLED")
@@ -125,6 +126,18 @@ class Settings(BaseSettings):
     def _normalize_log_level(cls, v):
         return str(v).upper().strip()
 
+    @cached_property
+    def runtime_dirs(self) -> Tuple[Tuple[str, Path], ...]:
+        """
+        (name, absolute path) for every runtime folder, computed once after validation.
+        """
+        return (
+            ("uploads", self.uploads_dir),
+            ("processed", self.processed_dir),
+            ("metadata", self.metadata_dir),
+            ("models", self.models_dir),
+        )
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
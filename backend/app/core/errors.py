@@ -1,15 +1,14 @@
 from __future__ import annotations
 
-import uuid
 from typing import Any, Dict, Optional
 
-from fastapi import FastAPI, Request
+import orjson
+from fastapi import FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
 from starlette import status
 
-from app.core.logging import get_logger
-from app.schemas.common import APIError
+from app.core.logging import REQUEST_ID_VAR, get_logger
+from app.utils.ids import new_trace_id
 
 logger = get_logger(__name__)
 
@@ -35,7 +34,25 @@ class AppError(Exception):
 
 
 def _trace_id() -> str:
-    return str(uuid.uuid4())
+    # Reuse the request id so error bodies and request logs share one identifier
+    return REQUEST_ID_VAR.get() or new_trace_id()
+
+
+def _error_content(
+    message: str,
+    code: str,
+    trace_id: str,
+    details: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    # Same shape as app.schemas.common.APIError, built as a plain dict to skip
+    # model construction + model_dump on every error response.
+    return {"message": message, "code": code, "trace_id": trace_id, "details": details}
+
+
+def _json_response(status_code: int, payload: Dict[str, Any]) -> Response:
+    # orjson-encoded body; ORJSONResponse is deprecated in recent FastAPI releases
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return Response(content=body, status_code=status_code, media_type="application/json")
 
 
 def register_exception_handlers(app: FastAPI) -> None:
@@ -52,13 +69,8 @@ def register_exception_handlers(app: FastAPI) -> None:
                 "details": exc.details,
             },
         )
-        payload = APIError(
-            message=exc.message,
-            code=exc.code,
-            trace_id=tid,
-            details=exc.details or None,
-        )
-        return JSONResponse(status_code=exc.status_code, content=payload.model_dump())
+        payload = _error_content(exc.message, exc.code, tid, exc.details or None)
+        return _json_response(exc.status_code, payload)
 
     @app.exception_handler(RequestValidationError)
     async def validation_error_handler(request: Request, exc: RequestValidationError):
@@ -73,13 +85,8 @@ def register_exception_handlers(app: FastAPI) -> None:
                 "errors": exc.errors(),
             },
         )
-        payload = APIError(
-            message="Validation failed",
-            code="validation_error",
-            trace_id=tid,
-            details={"errors": exc.errors()},
-        )
-        return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=payload.model_dump())
+        payload = _error_content("Validation failed", "validation_error", tid, {"errors": exc.errors()})
+        return _json_response(status.HTTP_422_UNPROCESSABLE_ENTITY, payload)
 
     @app.exception_handler(Exception)
     async def unhandled_error_handler(request: Request, exc: Exception):
@@ -92,9 +99,5 @@ def register_exception_handlers(app: FastAPI) -> None:
                 "method": request.method,
             },
         )
-        payload = APIError(
-            message="Internal server error",
-            code="internal_error",
-            trace_id=tid,
-        )
-        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=payload.model_dump())
+        payload = _error_content("Internal server error", "internal_error", tid)
+        return _json_response(status.HTTP_500_INTERNAL_SERVER_ERROR, payload)
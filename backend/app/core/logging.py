@@ -2,12 +2,16 @@ from __future__ import annotations
 
 import logging
 import sys
-from typing import Optional
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
 
-from pythonjsonlogger import jsonlogger
+import orjson
 
 from app.core.config import Settings
 
+# Set by the request middleware; read by log records and error handlers.
+REQUEST_ID_VAR: ContextVar[str] = ContextVar("request_id", default="")
+
 
 class _ContextFilter(logging.Filter):
     """
@@ -17,7 +21,7 @@ class _ContextFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         # Provide defaults for commonly-used fields
         if not hasattr(record, "request_id"):
-            record.request_id = None
+            record.request_id = REQUEST_ID_VAR.get() or None
         if not hasattr(record, "trace_id"):
             record.trace_id = None
         if not hasattr(record, "event"):
@@ -25,6 +29,39 @@ class _ContextFilter(logging.Filter):
         return True
 
 
+# Attributes every LogRecord has; anything else on the record came from `extra=`.
+_RESERVED_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message",
+    "asctime",
+    "event",
+    "request_id",
+    "trace_id",
+}
+
+
+class _JsonFormatter(logging.Formatter):
+    """
+    Minimal JSON formatter: fixed base keys plus `extra` fields, encoded with orjson.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": record.created,
+            "lvl": record.levelname,
+            "logger": record.name,
+            "event": record.event,
+            "request_id": record.request_id,
+            "trace_id": record.trace_id,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(payload, default=str).decode()
+
+
 def configure_logging(settings: Settings) -> None:
     """
     Configure root logger. Idempotent-ish: if handlers exist, we replace them to ensure consistency.
@@ -42,9 +79,7 @@ def configure_logging(settings: Settings) -> None:
     handler.addFilter(_ContextFilter())
 
     if settings.log_json:
-        formatter = jsonlogger.JsonFormatter(
-            fmt="%(asctime)s %(levelname)s %(name)s %(event)s %(request_id)s %(trace_id)s",
-        )
+        formatter = _JsonFormatter()
     else:
         formatter = logging.Formatter(
             fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import os
+import sys
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from pathlib import Path
 from typing import Callable
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.router import api_router
 from app.core.config import get_settings
 from app.core.errors import register_exception_handlers
-from app.core.logging import configure_logging, get_logger
+from app.core.logging import REQUEST_ID_VAR, configure_logging, get_logger
+from app.storage.metadata_store import MetadataStore
+from app.utils.files import ensure_dir
+from app.utils.ids import new_trace_id
+
+
+# uvicorn[standard] already runs on uvloop (loop="auto"); installing the policy here
+# covers other ASGI runners and scripts that create their own loop.
+if sys.platform != "win32":
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
 
 
 settings = get_settings()
@@ -26,18 +42,19 @@ def _ensure_runtime_dirs() -> None:
     Create runtime directories if missing.
     These are used for uploads, processed datasets, model artifacts, and metadata.
     """
-    for p in (
-        Path(settings.uploads_dir),
-        Path(settings.processed_dir),
-        Path(settings.models_dir),
-        Path(settings.metadata_dir),
-    ):
-        p.mkdir(parents=True, exist_ok=True)
+    for _name, p in settings.runtime_dirs:
+        ensure_dir(p)
+    MetadataStore(settings=settings).ensure_metadata_dirs()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _ensure_runtime_dirs()
+    # Bounded worker pool for SSE train/predict jobs (replaces a thread per request)
+    app.state.stream_pool = ThreadPoolExecutor(
+        max_workers=min(4, os.cpu_count() or 1),
+        thread_name_prefix="stream",
+    )
     logger.info(
         "backend_startup",
         extra={
@@ -49,26 +66,36 @@ async def lifespan(app: FastAPI):
         },
     )
     yield
+    app.state.stream_pool.shutdown(wait=False)
+    predict_pool = getattr(app.state, "predict_pool", None)  # built lazily by api.deps
+    if predict_pool is not None:
+        predict_pool.shutdown(wait=False)
     logger.info("backend_shutdown")
 
 
 def _add_middlewares(app: FastAPI) -> None:
-    # CORS (config-driven; no hardcoding)
-    allow_origins = list(settings.cors_allow_origins or [])
+    # CORS (config-driven; no hardcoding). List fields are already parsed by Settings.
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=allow_origins if allow_origins else [],
-        allow_credentials=bool(settings.cors_allow_credentials),
-        allow_methods=list(settings.cors_allow_methods or ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]),
-        allow_headers=list(settings.cors_allow_headers or ["*"]),
-        expose_headers=list(settings.cors_expose_headers or []),
-        max_age=int(settings.cors_max_age),
+        allow_origins=settings.cors_allow_origins,
+        allow_credentials=settings.cors_allow_credentials,
+        allow_methods=settings.cors_allow_methods,
+        allow_headers=settings.cors_allow_headers,
+        expose_headers=settings.cors_expose_headers,
+        max_age=settings.cors_max_age,
     )
 
+    # Compress larger JSON payloads (summaries, feature lists). SSE routes opt out via
+    # an explicit Content-Encoding header, since gzip buffering breaks event framing.
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
     # Request ID + basic timing logs (lightweight, no extra deps)
     @app.middleware("http")
     async def request_context_middleware(request: Request, call_next: Callable[[Request], Response]) -> Response:
-        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
+        request_id = request.headers.get("x-request-id") or new_trace_id()
+        # Not reset on exit: uvicorn runs each request in its own task context, and the
+        # server-error handler (outside this middleware) still needs the id.
+        REQUEST_ID_VAR.set(request_id)
         start = time.perf_counter()
 
         try:
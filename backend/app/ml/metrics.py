@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import Dict
 
-from app.schemas.common import NumericMetric
-
 
 def _fmt_pct(v: float) -> str:
     return f"{v * 100:.2f}%"
@@ -14,7 +12,9 @@ def format_metrics(raw: Dict[str, float]) -> Dict[str, dict]:
     Convert raw metric floats into the TrainingMetrics schema fields (NumericMetric).
     """
     def nm(v: float) -> dict:
-        return NumericMetric(value=float(v), display=_fmt_pct(float(v))).model_dump()
+        # Same shape as NumericMetric.model_dump(), without the model round trip
+        v = float(v)
+        return {"value": v, "display": _fmt_pct(v)}
 
     out: Dict[str, dict] = {
         "accuracy": nm(raw.get("accuracy", 0.0)),
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import os
+import warnings
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, OneToOneFeatureMixin, TransformerMixin
 from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction import FeatureHasher
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.impute import SimpleImputer
@@ -28,11 +33,12 @@ def _infer_dtype(series: pd.Series) -> str:
     return "string"
 
 
-def _allowed_values(series: pd.Series, max_unique: int = 25) -> Optional[List[str]]:
-    # For low-cardinality string columns, expose allowed values (helps UI dropdown)
+def _allowed_values(series: pd.Series, n_unique: Optional[int] = None, max_unique: int = 25) -> Optional[List[str]]:
+    # For low-cardinality string columns, expose allowed values (helps UI dropdown).
+    # Callers pass the dtype-filtered series plus a precomputed nunique to skip wide columns.
+    if n_unique is not None and not 0 < n_unique <= max_unique:
+        return None
     try:
-        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
-            return None
         vals = series.dropna().astype(str).unique().tolist()
         if 0 < len(vals) <= max_unique:
             return sorted(vals)
@@ -41,21 +47,33 @@ def _allowed_values(series: pd.Series, max_unique: int = 25) -> Optional[List[st
     return None
 
 
+def _first_valid(series: pd.Series) -> Any:
+    mask = series.notna().to_numpy()
+    if not mask.any():
+        return None
+    example = series.iloc[int(mask.argmax())]
+    if hasattr(example, "item"):
+        example = example.item()
+    if isinstance(example, (pd.Timestamp,)):
+        example = example.isoformat()
+    return example
+
+
 def build_schema(X: pd.DataFrame) -> BuiltSchema:
+    dtype_map = {col: _infer_dtype(X[col]) for col in X.columns}
+    string_cols = [col for col, dtype in dtype_map.items() if dtype == "string"]
+    try:
+        # One batched pass; only string columns are candidates for allowed_values
+        nunique: Dict[Any, int] = X[string_cols].nunique(dropna=True).to_dict() if string_cols else {}
+    except TypeError:
+        nunique = {}
+
     fields: List[Dict[str, Any]] = []
-    for col in X.columns.tolist():
+    for col, dtype in dtype_map.items():
         s = X[col]
-        dtype = _infer_dtype(s)
-        allowed = _allowed_values(s)
-        example = None
+        allowed = _allowed_values(s, nunique.get(col)) if dtype == "string" else None
         try:
-            non_null = s.dropna()
-            if len(non_null) > 0:
-                example = non_null.iloc[0]
-                if hasattr(example, "item"):
-                    example = example.item()
-                if isinstance(example, (pd.Timestamp,)):
-                    example = example.isoformat()
+            example = _first_valid(s)
         except Exception:
             example = None
 
@@ -72,23 +90,132 @@ def build_schema(X: pd.DataFrame) -> BuiltSchema:
     return BuiltSchema(fields=fields)
 
 
-def build_xgb_pipeline(X: pd.DataFrame, random_seed: int) -> Tuple[Pipeline, Dict[str, Any]]:
+# XGBoost bins features as float32 internally; emitting float32 from preprocessing halves
+# the bytes moved and avoids a conversion copy when the DMatrix is built.
+_FLOAT_DTYPE = np.float32
+
+
+def default_n_jobs() -> int:
+    # XGBoost's histogram build scales to roughly the physical core count, then
+    # degrades from contention; cap the default so large hosts don't oversubscribe.
+    return min(8, os.cpu_count() or 1)
+
+
+class MedianFillTransformer(OneToOneFeatureMixin, TransformerMixin, BaseEstimator):
+    """
+    Numeric imputer: per-column medians computed once at fit, written into NaN slots
+    of a float32 copy at transform. Replaces SimpleImputer(strategy="median") without
+    its per-call validation overhead. All-null columns are kept and filled with 0.
+    """
+
+    @staticmethod
+    def _to_float(X: Any) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            return X.to_numpy(dtype=_FLOAT_DTYPE, na_value=np.nan, copy=True)
+        return np.array(X, dtype=_FLOAT_DTYPE, copy=True)
+
+    def fit(self, X: Any, y: Any = None) -> "MedianFillTransformer":
+        arr = self._to_float(X)
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = arr.shape[1]
+        if arr.shape[0] and arr.shape[1]:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN column
+                medians = np.nanmedian(arr, axis=0)
+        else:
+            medians = np.zeros(arr.shape[1], dtype=_FLOAT_DTYPE)
+        self.medians_ = np.where(np.isnan(medians), 0.0, medians).astype(_FLOAT_DTYPE, copy=False)
+        return self
+
+    def transform(self, X: Any) -> np.ndarray:
+        arr = self._to_float(X)
+        np.copyto(arr, self.medians_, where=np.isnan(arr))
+        return arr
+
+
+# Categorical columns with more distinct values than this are hashed instead of one-hot encoded.
+_ONEHOT_MAX_CARDINALITY = 50
+# Hashed in place of missing categorical values.
+_MISSING_TOKEN = "__missing__"
+
+
+class HashedCategoricalEncoder(TransformerMixin, BaseEstimator):
+    """
+    Feature-hash each high-cardinality column into its own block of n_buckets sparse
+    slots. Width is fixed regardless of cardinality, and every slot still maps back to
+    exactly one source column (feature names are "<col>_h<i>").
+    """
+
+    def __init__(self, n_buckets: int = 64) -> None:
+        self.n_buckets = n_buckets
+
+    def fit(self, X: Any, y: Any = None) -> "HashedCategoricalEncoder":
+        cols = X.columns if isinstance(X, pd.DataFrame) else range(np.shape(X)[1])
+        self.feature_names_in_ = np.asarray([str(c) for c in cols], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        return self
+
+    def transform(self, X: Any) -> sp.csr_matrix:
+        frame = X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+        hasher = FeatureHasher(
+            n_features=self.n_buckets,
+            input_type="string",
+            alternate_sign=False,
+            dtype=_FLOAT_DTYPE,
+        )
+        blocks = [
+            hasher.transform([[v] for v in self._tokens(frame.iloc[:, i])])
+            for i in range(frame.shape[1])
+        ]
+        return sp.hstack(blocks, format="csr")
+
+    @staticmethod
+    def _tokens(col: pd.Series) -> List[str]:
+        # None and NaN share one token, so the bucket doesn't depend on how the frame was loaded
+        return col.astype(object).where(col.notna(), _MISSING_TOKEN).astype(str).tolist()
+
+    def get_feature_names_out(self, input_features: Any = None) -> np.ndarray:
+        cols = self.feature_names_in_ if input_features is None else input_features
+        return np.asarray([f"{c}_h{i}" for c in cols for i in range(self.n_buckets)], dtype=object)
+
+
+def build_xgb_pipeline(
+    X: pd.DataFrame,
+    random_seed: int,
+    *,
+    n_jobs: Optional[int] = None,
+    device: str = "cpu",
+    early_stopping_rounds: Optional[int] = None,
+) -> Tuple[Pipeline, Dict[str, Any]]:
     """
     Build a pipeline that is consistent between training and inference:
     - numeric: impute median
     - categorical: impute most_frequent + one-hot (ignore unknowns)
-    - model: XGBoost classifier
+    - high-cardinality categorical (> _ONEHOT_MAX_CARDINALITY values): feature hashing
+    - model: XGBoost classifier, histogram tree builder (n_jobs defaults to default_n_jobs())
+
+    early_stopping_rounds only takes effect when the model is fit with an eval_set.
     """
-    numeric_features = [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c])]
-    bool_features = [c for c in X.columns if pd.api.types.is_bool_dtype(X[c])]
-    # Treat bools as categorical or numeric? We'll treat as categorical for stability.
-    categorical_features = [c for c in X.columns if c not in numeric_features]
-    # ensure bool columns are included in categorical_features (already)
-    _ = bool_features  # kept for readability/future branching
+    # One pass over the dtypes. Bools count as numeric (is_numeric_dtype is True for
+    # them), which keeps them on the median-fill branch as before.
+    num_mask = X.dtypes.map(pd.api.types.is_numeric_dtype).to_numpy(dtype=bool)
+    numeric_features = X.columns[num_mask].tolist()
+    categorical_features = X.columns[~num_mask].tolist()
+    hashed_features: List[Any] = []
+    if categorical_features:
+        try:
+            cardinality = X[categorical_features].nunique(dropna=True)
+        except TypeError:
+            cardinality = None
+        if cardinality is not None:
+            high = cardinality > _ONEHOT_MAX_CARDINALITY
+            hashed_features = cardinality.index[high].tolist()
+            categorical_features = cardinality.index[~high].tolist()
 
     numeric_transformer = Pipeline(
         steps=[
-            ("imputer", SimpleImputer(strategy="median")),
+            ("imputer", MedianFillTransformer()),
         ]
     )
 
@@ -97,18 +224,29 @@ def build_xgb_pipeline(X: pd.DataFrame, random_seed: int) -> Tuple[Pipeline, Dic
             ("imputer", SimpleImputer(strategy="most_frequent")),
             (
                 "onehot",
-                OneHotEncoder(handle_unknown="ignore", sparse_output=False),
+                OneHotEncoder(
+                    handle_unknown="ignore",
+                    sparse_output=True,
+                    dtype=_FLOAT_DTYPE,
+                ),
             ),
         ]
     )
 
+    transformers: List[Tuple[str, Any, List[Any]]] = [("num", numeric_transformer, numeric_features)]
+    # Empty selections are left out: ColumnTransformer keeps them unfitted, which would
+    # break category lookups when aggregating feature importance.
+    if categorical_features:
+        transformers.append(("cat", categorical_transformer, categorical_features))
+    if hashed_features:
+        transformers.append(("hash", HashedCategoricalEncoder(), hashed_features))
+
     preprocessor = ColumnTransformer(
-        transformers=[
-            ("num", numeric_transformer, numeric_features),
-            ("cat", categorical_transformer, categorical_features),
-        ],
+        transformers=transformers,
         remainder="drop",
-        sparse_threshold=0.0,
+        # Mostly-zero one-hot blocks stay CSR; XGBoost's hist builder consumes it natively.
+        # The dense/sparse choice is fixed at fit time, so inference sees the same layout.
+        sparse_threshold=0.3,
     )
 
     model = XGBClassifier(
@@ -120,7 +258,12 @@ def build_xgb_pipeline(X: pd.DataFrame, random_seed: int) -> Tuple[Pipeline, Dic
         reg_lambda=1.0,
         random_state=random_seed,
         eval_metric="logloss",
-        n_jobs=1,  # safer default for student machines; can be configured later
+        tree_method="hist",
+        max_bin=256,
+        grow_policy="depthwise",
+        device=device or "cpu",
+        early_stopping_rounds=early_stopping_rounds or None,
+        n_jobs=int(n_jobs) if n_jobs else default_n_jobs(),
     )
 
     pipe = Pipeline(steps=[("preprocess", preprocessor), ("model", model)])
@@ -128,5 +271,6 @@ def build_xgb_pipeline(X: pd.DataFrame, random_seed: int) -> Tuple[Pipeline, Dic
     meta: Dict[str, Any] = {
         "numeric_features": numeric_features,
         "categorical_features": categorical_features,
+        "hashed_features": hashed_features,
     }
     return pipe, meta
@@ -1,13 +1,249 @@
 from __future__ import annotations
 
-from typing import Any, Tuple
+import asyncio
+import functools
+import weakref
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+from scipy.special import expit
 from starlette import status
+from xgboost import DMatrix
 
 from app.core.errors import AppError
 
 
+# (group index of each transformed column, base input column name per group)
+BaseGroups = Tuple[np.ndarray, List[str]]
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    Inference handles pulled out of a preprocess + XGBoost pipeline once per loaded artifact.
+    Deliberately holds no reference back to the pipeline (it is the weak cache key below).
+    """
+
+    pre: Any
+    booster: Any
+    iteration_range: Tuple[int, int]
+    feature_names: Optional[List[str]]  # transformed (post-preprocess) column names
+    base_groups: Optional[BaseGroups]  # see group_base_features
+    logistic: bool  # binary:logistic, so probability = sigmoid(sum of pred_contribs)
+
+
+def base_feature_names(feature_names: Sequence[str], feature_columns: Sequence[str]) -> List[str]:
+    """
+    Map each transformed column name (e.g. "cat__Contract_Month-to-month") back to the
+    input column it was derived from, preferring the longest matching column prefix.
+    """
+    columns = set(feature_columns)
+    by_len = sorted(feature_columns, key=len, reverse=True)
+    out: List[str] = []
+    for name in feature_names:
+        base = name.split("__", 1)[-1]
+        if base not in columns:
+            for feat in by_len:
+                if base.startswith(f"{feat}_") or base.startswith(f"{feat}=") or base.startswith(f"{feat}__"):
+                    base = feat
+                    break
+            else:
+                base = base.split("_", 1)[0] if "_" in base else base
+        out.append(base)
+    return out
+
+
+def group_base_features(base_features: Sequence[str]) -> BaseGroups:
+    """
+    Integer group ids for per-base-column reductions (np.bincount). Groups are numbered in
+    first-seen order.
+    """
+    index: Dict[str, int] = {}
+    ids = [index.setdefault(b, len(index)) for b in base_features]
+    return np.asarray(ids, dtype=np.intp), list(index)
+
+
+def inference_dmatrix(Xp: Any) -> DMatrix:
+    """
+    DMatrix for an already-preprocessed matrix (float32 dense or CSR). Missing value and
+    thread count are given explicitly and no feature names are attached, so construction
+    skips name validation; the matrix is small and built per call, so one thread suffices.
+    """
+    return DMatrix(Xp, missing=np.nan, nthread=1)
+
+
+_LOADED: "weakref.WeakKeyDictionary[Any, Optional[LoadedModel]]" = weakref.WeakKeyDictionary()
+
+
+def loaded_model(pipeline: Any) -> Optional[LoadedModel]:
+    """
+    LoadedModel for a pipeline, resolved on first use and cached for the pipeline's lifetime.
+    None when the pipeline isn't preprocess + XGBoost.
+    """
+    try:
+        return _LOADED[pipeline]
+    except (KeyError, TypeError):
+        pass
+
+    resolved: Optional[LoadedModel] = None
+    try:
+        preprocess = pipeline.named_steps["preprocess"]
+        model = pipeline.named_steps["model"]
+        booster = model.get_booster()
+        # Requests are scored in parallel on a worker pool; one thread per call avoids
+        # oversubscribing cores (also applies to the predict_proba fallback)
+        try:
+            model.set_params(n_jobs=1)
+            booster.set_param({"nthread": 1})
+        except Exception:
+            pass
+        try:
+            # Early-stopped models must only use the best rounds, as predict_proba does
+            best = model.best_iteration
+            iteration_range = (0, int(best) + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+        try:
+            feature_names: Optional[List[str]] = [str(n) for n in preprocess.get_feature_names_out()]
+        except Exception:
+            feature_names = None
+        base_groups: Optional[BaseGroups] = None
+        input_columns = getattr(preprocess, "feature_names_in_", None)
+        if feature_names is not None and input_columns is not None:
+            base_groups = group_base_features(base_feature_names(feature_names, [str(c) for c in input_columns]))
+        resolved = LoadedModel(
+            pre=preprocess,
+            booster=booster,
+            iteration_range=iteration_range,
+            feature_names=feature_names,
+            base_groups=base_groups,
+            logistic=getattr(model, "objective", None) == "binary:logistic",
+        )
+    except Exception:
+        resolved = None
+
+    try:
+        _LOADED[pipeline] = resolved
+    except TypeError:
+        pass
+    return resolved
+
+
+# Per-booster copies placed on another device (e.g. "cuda"), used by the batched path only
+_DEVICE_BOOSTERS: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+def _booster_on(lm: LoadedModel, device: str) -> Any:
+    if device == "cpu":
+        return lm.booster
+    try:
+        return _DEVICE_BOOSTERS[lm.booster]
+    except KeyError:
+        pass
+    try:
+        booster = lm.booster.copy()
+        booster.set_param({"device": device})
+    except Exception:
+        # No CUDA-enabled xgboost build or device: keep scoring on CPU
+        booster = lm.booster
+    _DEVICE_BOOSTERS[lm.booster] = booster
+    return booster
+
+
+def _to_device(Xp: Any, device: str) -> Any:
+    """
+    Move a dense preprocessed batch to the GPU with cupy when available, so XGBoost
+    doesn't fall back to a host-to-device copy per predict call.
+    """
+    if device == "cpu" or not isinstance(Xp, np.ndarray):
+        return Xp
+    try:
+        import cupy as cp
+    except ImportError:
+        return Xp
+    return cp.asarray(Xp)
+
+
+def _to_host(a: Any) -> np.ndarray:
+    # cupy arrays come back from inplace_predict on device input
+    return np.asarray(a.get() if hasattr(a, "get") else a)
+
+
+def predict_proba_batch(pipeline: Any, X: pd.DataFrame) -> np.ndarray:
+    """
+    Class-1 probability for every row of X. Goes straight to Booster.inplace_predict on
+    the preprocessed matrix (no Pipeline/XGBClassifier wrapper overhead); falls back to
+    pipeline.predict_proba for anything that isn't a preprocess + XGBoost pipeline.
+    """
+    lm = loaded_model(pipeline)
+    if lm is not None:
+        try:
+            Xp = lm.pre.transform(X)
+            prob = np.asarray(lm.booster.inplace_predict(Xp, iteration_range=lm.iteration_range))
+            return prob.reshape(len(X), -1)[:, -1]
+        except Exception:
+            pass
+    return np.asarray(pipeline.predict_proba(X))[:, 1]
+
+
+def score_batch(
+    pipeline: Any,
+    X: pd.DataFrame,
+    *,
+    device: str = "cpu",
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[BaseGroups]]:
+    """
+    Class-1 probabilities plus per-row tree-SHAP contributions (pred_contribs, bias in the
+    last column) from a single preprocess pass, with the base-column grouping of the
+    contribution columns. Contributions and groups are None when the pipeline isn't
+    preprocess + XGBoost or the contribution pass fails.
+
+    For binary:logistic models the contributions of a row sum to its raw margin, so the
+    probability is their sigmoid and the trees are only walked once.
+
+    device other than "cpu" scores on a copy of the booster placed on that device.
+    """
+    lm = loaded_model(pipeline)
+    if lm is None:
+        return np.asarray(pipeline.predict_proba(X))[:, 1], None, None
+
+    try:
+        Xp = lm.pre.transform(X)
+    except Exception:
+        return np.asarray(pipeline.predict_proba(X))[:, 1], None, None
+    booster = _booster_on(lm, device)
+    if booster is not lm.booster:
+        Xp = _to_device(Xp, device)
+
+    if lm.base_groups is not None and lm.logistic:
+        try:
+            contribs = _to_host(
+                booster.predict(inference_dmatrix(Xp), pred_contribs=True, iteration_range=lm.iteration_range)
+            )
+            return expit(contribs.sum(axis=1, dtype=np.float64)), contribs, lm.base_groups
+        except Exception:
+            pass
+
+    try:
+        prob = _to_host(booster.inplace_predict(Xp, iteration_range=lm.iteration_range))
+        prob = prob.reshape(len(X), -1)[:, -1]
+    except Exception:
+        return np.asarray(pipeline.predict_proba(X))[:, 1], None, None
+
+    if lm.base_groups is None:
+        return prob, None, None
+    try:
+        contribs = _to_host(
+            booster.predict(inference_dmatrix(Xp), pred_contribs=True, iteration_range=lm.iteration_range)
+        )
+    except Exception:
+        return prob, None, None
+    return prob, contribs, lm.base_groups
+
+
 def predict_with_pipeline(pipeline: Any, X: pd.DataFrame) -> Tuple[int, float]:
     """
     Predict with a persisted sklearn Pipeline.
@@ -28,21 +264,114 @@ def predict_with_pipeline(pipeline: Any, X: pd.DataFrame) -> Tuple[int, float]:
             code="input_missing",
         )
 
+    # One forward pass: the label is derived from the class-1 probability, which is
+    # exactly what XGBClassifier.predict does internally.
     try:
-        pred = pipeline.predict(X)
-    except Exception as e:
-        raise AppError(
-            "Failed to run prediction.",
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            code="predict_failed",
-            details={"error": str(e)},
-        )
-
-    try:
-        prob = pipeline.predict_proba(X)[:, 1]
-        prob_val = float(prob[0])
+        prob_val = float(predict_proba_batch(pipeline, X)[0])
     except Exception:
-        # If probability is unavailable, return 0.0/1.0 based on label
-        prob_val = 1.0 if int(pred[0]) == 1 else 0.0
+        prob_val = None
+
+    if prob_val is None:
+        # If probability is unavailable, fall back to the label and return 0.0/1.0
+        try:
+            pred = int(pipeline.predict(X)[0])
+        except Exception as e:
+            raise AppError(
+                "Failed to run prediction.",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                code="predict_failed",
+                details={"error": str(e)},
+            )
+        return pred, 1.0 if pred == 1 else 0.0
+
+    return int(prob_val >= 0.5), prob_val
+
+
+# (label, probability, contribution row or None, base-column groups or None)
+BatchResult = Tuple[int, float, Optional[np.ndarray], Optional[BaseGroups]]
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent predictions for one pipeline. Requests that arrive within
+    max_wait_ms of each other are stacked into one frame, preprocessed once and scored
+    (probabilities and pred_contribs) on a worker thread; each caller gets the result
+    for the first row it submitted, as with predict_with_pipeline. Batches can be scored
+    on a GPU (device="cuda"), where the batch size pays for the transfer.
+
+    The collector task only runs while requests are queued, so an idle batcher holds
+    no task and can simply be dropped.
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        *,
+        max_wait_ms: float = 5.0,
+        max_batch: int = 64,
+        executor: Optional[Executor] = None,
+        device: str = "cpu",
+    ) -> None:
+        self.pipeline = pipeline
+        self.executor = executor
+        self.device = device
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, X: pd.DataFrame) -> BatchResult:
+        if X is None or not isinstance(X, pd.DataFrame) or X.empty:
+            raise AppError(
+                "Input features are missing for prediction.",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                code="input_missing",
+            )
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait((X, fut))
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._collect())
+        return await fut
+
+    async def _collect(self) -> None:
+        queue = self._queue
+        if queue is None:
+            return
+        while not queue.empty():
+            batch = [queue.get_nowait()]
+            if self.max_wait_s:
+                await asyncio.sleep(self.max_wait_s)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            await self._score(batch)
+
+    async def _score(self, batch: List[Tuple[pd.DataFrame, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        frames = [X.iloc[:1] for X, _fut in batch]
+        try:
+            combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            score = functools.partial(score_batch, self.pipeline, combined, device=self.device)
+            probs, contribs, names = await loop.run_in_executor(self.executor, score)
+        except Exception:
+            # One malformed row shouldn't fail its neighbours: score each on its own
+            for X, fut in batch:
+                try:
+                    label, prob = await loop.run_in_executor(
+                        self.executor, predict_with_pipeline, self.pipeline, X
+                    )
+                except Exception as e:
+                    if not fut.done():
+                        fut.set_exception(e)
+                else:
+                    if not fut.done():
+                        fut.set_result((label, prob, None, None))
+            return
 
-    return int(pred[0]), prob_val
+        for i, ((_X, fut), prob) in enumerate(zip(batch, probs.tolist())):
+            if not fut.done():
+                row = contribs[i] if contribs is not None else None
+                fut.set_result((int(prob >= 0.5), float(prob), row, names))
@@ -7,16 +7,13 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from sklearn.metrics import (
-    accuracy_score,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
     average_precision_score,
+    precision_recall_fscore_support,
+    roc_auc_score,
 )
 from sklearn.model_selection import train_test_split
 from starlette import status
+from threadpoolctl import threadpool_limits
 from xgboost.callback import TrainingCallback
 
 from app.core.errors import AppError
@@ -32,6 +29,22 @@ class TrainArtifacts:
     feature_importance: List[Tuple[str, float]]
 
 
+_TARGET_LABELS: Dict[str, int] = {
+    "1": 1,
+    "0": 0,
+    "yes": 1,
+    "no": 0,
+    "true": 1,
+    "false": 0,
+    "churn": 1,
+    "no churn": 0,
+    "not churn": 0,
+    "exited": 1,
+    "stayed": 0,
+    "stay": 0,
+}
+
+
 def _normalize_target(y: pd.Series) -> pd.Series:
     """
     Normalize churn target to 0/1.
@@ -47,33 +60,55 @@ def _normalize_target(y: pd.Series) -> pd.Series:
         # If already 0/1 or close
         return y.astype(int)
 
-    # Strings / objects
-    s = y.astype(str).str.strip().str.lower()
-    mapping = {
-        "1": 1,
-        "0": 0,
-        "yes": 1,
-        "no": 0,
-        "true": 1,
-        "false": 0,
-        "churn": 1,
-        "no churn": 0,
-        "not churn": 0,
-        "exited": 1,
-        "stayed": 0,
-        "stay": 0,
-    }
-    mapped = s.map(mapping)
-    if mapped.isna().any():
+    # Strings / objects: normalize the (few) distinct labels once, then map codes.
+    # Unused categories of an already-categorical target would read as unknown labels
+    cats = pd.Categorical(y).remove_unused_categories()
+    labels = [str(c).strip().lower() for c in cats.categories]
+    # Trailing -1 slot: code -1 (missing) indexes the end and reads as unknown.
+    lut = np.array([_TARGET_LABELS.get(label, -1) for label in labels] + [-1], dtype=np.int8)
+    # Categories are only the observed labels, so unknowns can be read off the table.
+    unknown_labels = {labels[i] for i in np.flatnonzero(lut[:-1] == -1).tolist()}
+    if (cats.codes == -1).any():
+        unknown_labels.add("nan")
+    if unknown_labels:
         # If still contains unknowns, fail clearly
-        unknown = sorted(set(s[mapped.isna()].unique().tolist()))[:10]
+        unknown = sorted(unknown_labels)[:10]
         raise AppError(
             "Target column contains unsupported labels. Use a binary target (0/1 or Yes/No).",
             status_code=status.HTTP_400_BAD_REQUEST,
             code="invalid_target_labels",
             details={"examples_of_unknown_labels": unknown},
         )
-    return mapped.astype(int)
+    return pd.Series(lut[cats.codes].astype(int), index=y.index, name=y.name)
+
+
+def _fit_with_early_stopping(
+    pipeline: Any,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    fit_params: Dict[str, Any],
+    *,
+    random_seed: int,
+) -> None:
+    """
+    Fit preprocess and model separately so the model can watch a validation split
+    (carved from the training rows) and stop once logloss plateaus.
+    """
+    stratify = y_train if y_train.value_counts().min() >= 2 else None
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train,
+        y_train,
+        test_size=0.1,
+        random_state=random_seed,
+        stratify=stratify,
+    )
+    preprocess = pipeline.named_steps["preprocess"]
+    Xt_fit = preprocess.fit_transform(X_fit, y_fit)
+    Xt_val = preprocess.transform(X_val)
+
+    model_params = {k.split("__", 1)[1]: v for k, v in fit_params.items() if k.startswith("model__")}
+    model_params["verbose"] = False
+    pipeline.named_steps["model"].fit(Xt_fit, y_fit, eval_set=[(Xt_val, y_val)], **model_params)
 
 
 def train_xgb_pipeline(
@@ -84,6 +119,9 @@ def train_xgb_pipeline(
     test_size: float,
     progress_cb: Optional[Callable[[int, str], None]] = None,
     progress_range: Tuple[int, int] = (0, 100),
+    n_jobs: Optional[int] = None,
+    device: str = "cpu",
+    early_stopping_rounds: Optional[int] = None,
 ) -> TrainArtifacts:
     def _emit(pct: float, msg: str) -> None:
         if progress_cb is not None:
@@ -104,9 +142,10 @@ def train_xgb_pipeline(
 
     y_norm = _normalize_target(y)
 
-    # Stratify only if both classes exist
-    unique = sorted(y_norm.unique().tolist())
-    if len(unique) != 2:
+    # One sorted unique pass; both classes must exist (and then stratify on them)
+    uniq = np.unique(y_norm.to_numpy())
+    unique = uniq.tolist()
+    if uniq.size != 2:
         raise AppError(
             "Target column must be binary (two classes).",
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -114,7 +153,7 @@ def train_xgb_pipeline(
             details={"unique_values": unique},
         )
 
-    stratify = y_norm if y_norm.nunique() == 2 else None
+    stratify = y_norm
 
     start_pct, end_pct = progress_range
     start_pct = max(0, min(100, int(start_pct)))
@@ -128,7 +167,13 @@ def train_xgb_pipeline(
         random_state=int(random_seed),
         stratify=stratify,
     )
-    pipeline, _meta = build_xgb_pipeline(X_train, random_seed=int(random_seed))
+    pipeline, _meta = build_xgb_pipeline(
+        X_train,
+        random_seed=int(random_seed),
+        n_jobs=n_jobs,
+        device=device,
+        early_stopping_rounds=early_stopping_rounds,
+    )
     prep_pct = min(start_pct + 1, end_pct)
     _emit(prep_pct, "Preparing training pipeline")
 
@@ -136,14 +181,19 @@ def train_xgb_pipeline(
         def __init__(self, total_rounds: int) -> None:
             self.total_rounds = max(1, int(total_rounds))
             self.last_pct = -1
+            # Progress is whole percent, so sample at most one emit per percent step
+            self.every = max(1, self.total_rounds // max(1, end_pct - start_pct))
 
         def after_iteration(self, model, epoch: int, evals_log) -> bool:
-            frac = float(epoch + 1) / float(self.total_rounds)
+            done = epoch + 1
+            if done % self.every and done != self.total_rounds:
+                return False
+            frac = float(done) / float(self.total_rounds)
             pct = start_pct + (end_pct - start_pct) * frac
             pct_int = int(pct)
             if pct_int != self.last_pct:
                 self.last_pct = pct_int
-                _emit(pct_int, f"Training model ({epoch + 1}/{self.total_rounds})")
+                _emit(pct_int, f"Training model ({done}/{self.total_rounds})")
             return False
 
     fit_params: Dict[str, Any] = {}
@@ -162,23 +212,39 @@ def train_xgb_pipeline(
             _emit(start_pct, "Fitting model (progress callbacks not supported)")
 
     _emit(start_pct, "Fitting model")
-    pipeline.fit(X_train, y_train, **fit_params)
+    # XGBoost runs its own OpenMP threads; keep BLAS single-threaded so the two
+    # runtimes don't oversubscribe the cores during fit.
+    with threadpool_limits(limits=1, user_api="blas"):
+        if early_stopping_rounds:
+            _fit_with_early_stopping(pipeline, X_train, y_train, fit_params, random_seed=int(random_seed))
+        else:
+            pipeline.fit(X_train, y_train, **fit_params)
     _emit(end_pct, "Model fit complete")
 
-    # Predictions
-    y_pred = pipeline.predict(X_test)
+    # Predictions: preprocess the test split once and derive labels from probabilities
+    Xp_test = pipeline.named_steps["preprocess"].transform(X_test)
+    model = pipeline.named_steps["model"]
     try:
-        y_prob = pipeline.predict_proba(X_test)[:, 1]
+        y_prob = model.predict_proba(Xp_test)[:, 1]
+        y_pred = (y_prob >= 0.5).astype(int)
     except Exception:
         # Fallback if predict_proba unavailable (should be available for XGBClassifier)
         y_prob = None
-
-    # Metrics
+        y_pred = model.predict(Xp_test)
+
+    # Metrics: accuracy from the confusion matrix, P/R/F1 from one combined call
+    # Labels are already normalized to 0/1, so the 2x2 matrix is a bincount of 2*true + pred
+    cm_idx = (np.asarray(y_test, dtype=np.intp) << 1) | np.asarray(y_pred, dtype=np.intp)
+    cm_arr = np.bincount(cm_idx, minlength=4).reshape(2, 2)
+    precision, recall, f1, _support = precision_recall_fscore_support(
+        y_test, y_pred, labels=[0, 1], average="binary", zero_division=0
+    )
+    total = int(cm_arr.sum())
     metrics: Dict[str, float] = {
-        "accuracy": float(accuracy_score(y_test, y_pred)),
-        "precision": float(precision_score(y_test, y_pred, zero_division=0)),
-        "recall": float(recall_score(y_test, y_pred, zero_division=0)),
-        "f1": float(f1_score(y_test, y_pred, zero_division=0)),
+        "accuracy": float(np.trace(cm_arr)) / total if total else 0.0,
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(f1),
     }
 
     if y_prob is not None:
@@ -191,7 +257,7 @@ def train_xgb_pipeline(
         except Exception:
             metrics["pr_auc"] = float("nan")
 
-    cm = confusion_matrix(y_test, y_pred, labels=[0, 1]).tolist()
+    cm = cm_arr.tolist()
 
     def aggregate_feature_importance() -> List[Tuple[str, float]]:
         """
@@ -213,9 +279,11 @@ def train_xgb_pipeline(
         if preprocess is None or not hasattr(preprocess, "transformers_"):
             return fallback
 
-        totals = {c: 0.0 for c in columns}
-        idx = 0
-
+        # One group per source column: numeric columns map to one slot, categorical
+        # columns to len(categories) one-hot slots, hashed columns to n_buckets slots.
+        # Sum each group with one reduceat.
+        col_order: List[str] = []
+        group_sizes: List[int] = []
         for name, transformer, cols in preprocess.transformers_:
             if name == "remainder" and transformer == "drop":
                 continue
@@ -225,11 +293,8 @@ def train_xgb_pipeline(
             cols_list = [str(c) for c in cols]
 
             if name == "num":
-                for col in cols_list:
-                    if idx >= importances.size:
-                        break
-                    totals[col] += float(importances[idx])
-                    idx += 1
+                col_order.extend(cols_list)
+                group_sizes.extend([1] * len(cols_list))
             elif name == "cat":
                 onehot = None
                 if hasattr(transformer, "named_steps"):
@@ -237,17 +302,29 @@ def train_xgb_pipeline(
                 if onehot is None or not hasattr(onehot, "categories_"):
                     return fallback
                 for col, cats in zip(cols_list, onehot.categories_):
-                    n = len(cats)
-                    if n <= 0:
-                        continue
-                    if idx >= importances.size:
-                        break
-                    end = min(idx + n, importances.size)
-                    totals[col] += float(np.sum(importances[idx:end]))
-                    idx = end
+                    col_order.append(col)
+                    group_sizes.append(len(cats))
+            elif name == "hash":
+                n_buckets = int(getattr(transformer, "n_buckets", 0))
+                col_order.extend(cols_list)
+                group_sizes.extend([n_buckets] * len(cols_list))
             else:
                 return fallback
 
+        totals = {c: 0.0 for c in columns}
+        if not group_sizes:
+            return fallback
+
+        sizes = np.asarray(group_sizes, dtype=np.intp)
+        starts = np.cumsum(sizes) - sizes
+        # Empty groups contribute nothing; groups starting past the end were truncated.
+        keep = (sizes > 0) & (starts < importances.size)
+        if keep.any():
+            sums = np.add.reduceat(importances, starts[keep])
+            kept_cols = [c for c, k in zip(col_order, keep.tolist()) if k]
+            for col, val in zip(kept_cols, sums.tolist()):
+                totals[col] += val
+
         return [(c, totals.get(c, 0.0)) for c in columns]
 
     feature_importance = aggregate_feature_importance()
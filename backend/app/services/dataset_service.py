@@ -4,17 +4,22 @@ from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from fastapi import UploadFile
 from starlette import status
 
 from app.core.config import Settings
 from app.core.errors import AppError
+from app.core.logging import get_logger
 from app.schemas.common import ColumnInfo
 from app.schemas.datasets import DatasetInfo, PreprocessRequest, PreprocessResponse
 from app.storage.dataset_store import DatasetStore
 from app.storage.metadata_store import MetadataStore
 from app.utils.ids import new_id
 
+logger = get_logger(__name__)
+
 
 @dataclass(frozen=True)
 class DatasetService:
@@ -48,7 +53,13 @@ class DatasetService:
         )
 
         # Persist dataset info for later steps (preprocess/train)
-        self.metadata_store.write_upload_metadata(upload_id, info.model_dump())
+        upload_meta = info.model_dump()
+        try:
+            upload_meta["parquet_path"] = str(self.dataset_store.save_upload_parquet(upload_id, df))
+        except Exception:
+            # Best effort: preprocess falls back to re-reading the raw file
+            logger.warning("upload_parquet_failed", extra={"upload_id": upload_id})
+        self.metadata_store.write_upload_metadata(upload_id, upload_meta)
 
         return info
 
@@ -62,22 +73,29 @@ class DatasetService:
                 code="upload_not_found",
             )
 
-        raw_path = self.dataset_store.get_upload_path(req.upload_id)
-        if not raw_path.exists():
-            raise AppError(
-                "Uploaded file not found on server. Please upload again.",
-                status_code=status.HTTP_404_NOT_FOUND,
-                code="upload_file_missing",
-            )
+        # Rows are filtered and re-written in Arrow; pandas only sees the preview slice
+        parquet_path_str = upload_meta.get("parquet_path")
+        parquet_path = self.dataset_store.path_from_string(parquet_path_str) if parquet_path_str else None
+        if parquet_path is not None and parquet_path.exists():
+            table = self.dataset_store.load_table(parquet_path)
+        else:
+            raw_path = self.dataset_store.get_upload_path(req.upload_id)
+            if not raw_path.exists():
+                raise AppError(
+                    "Uploaded file not found on server. Please upload again.",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    code="upload_file_missing",
+                )
 
-        df = self.dataset_store.load_dataframe(raw_path)
+            table = self.dataset_store.load_table(raw_path)
 
-        if req.target_column not in df.columns:
+        column_names = table.column_names
+        if req.target_column not in column_names:
             raise AppError(
                 f"Target column '{req.target_column}' not found in dataset.",
                 status_code=status.HTTP_400_BAD_REQUEST,
                 code="invalid_target",
-                details={"available_columns": list(map(str, df.columns.tolist()))},
+                details={"available_columns": list(map(str, column_names))},
             )
 
         excluded = set([c for c in req.excluded_columns if c])
@@ -85,7 +103,7 @@ class DatasetService:
         if req.target_column in excluded:
             excluded.remove(req.target_column)
 
-        feature_columns = [c for c in df.columns.tolist() if c != req.target_column and c not in excluded]
+        feature_columns = [c for c in column_names if c != req.target_column and c not in excluded]
         if not feature_columns:
             raise AppError(
                 "No feature columns remain after excluding columns. Please adjust selection.",
@@ -93,17 +111,30 @@ class DatasetService:
                 code="no_features",
             )
 
-        # Basic cleaning: drop rows where target is null
-        before_rows = int(df.shape[0])
-        df = df.dropna(subset=[req.target_column])
-        after_rows = int(df.shape[0])
+        # Basic cleaning: drop rows where target is null (NaN counts as null, as in pandas dropna)
+        before_rows = int(table.num_rows)
+        target = table.column(req.target_column)
+        keep = pc.is_valid(target)
+        if pa.types.is_floating(target.type):
+            keep = pc.and_(keep, pc.fill_null(pc.invert(pc.is_nan(target)), False))
+        table = table.filter(keep)
+        after_rows = int(table.num_rows)
+        shape = [after_rows, int(table.num_columns)]
 
         notes: List[str] = []
         if after_rows < before_rows:
             notes.append(f"Dropped {before_rows - after_rows} rows with null target values.")
 
         # Store processed dataset as Parquet for faster reload and typed storage
-        processed_path = self.dataset_store.save_processed(upload_id=req.upload_id, df=df)
+        processed_path = self.dataset_store.save_processed_table(upload_id=req.upload_id, table=table)
+
+        # Numeric/categorical split from the Arrow schema (pandas maps these types to numeric dtypes)
+        numeric_cols: List[str] = []
+        categorical_cols: List[str] = []
+        for c in feature_columns:
+            t = table.schema.field(c).type
+            is_numeric = pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_boolean(t)
+            (numeric_cols if is_numeric else categorical_cols).append(c)
 
         # Persist preprocess metadata (used by training)
         self.metadata_store.write_preprocess_metadata(
@@ -113,49 +144,61 @@ class DatasetService:
                 "target_column": req.target_column,
                 "excluded_columns": list(excluded),
                 "feature_columns": feature_columns,
+                "numeric_cols": numeric_cols,
+                "categorical_cols": categorical_cols,
                 "processed_path": str(processed_path),
-                "shape": [int(df.shape[0]), int(df.shape[1])],
+                "shape": shape,
             },
         )
 
-        preview = self._preview_rows(df, max_rows=10)
+        preview = self._preview_rows(table.slice(0, 10).to_pandas(), max_rows=10)
 
         return PreprocessResponse(
             upload_id=req.upload_id,
             target_column=req.target_column,
             feature_columns=feature_columns,
-            shape=[int(df.shape[0]), int(df.shape[1])],
+            shape=shape,
             preview=preview,
             notes=notes or None,
         )
 
     def _preview_rows(self, df: pd.DataFrame, max_rows: int = 10) -> List[Dict[str, Any]]:
         try:
-            # Convert NaN to None for JSON friendliness
-            preview_df = df.head(max_rows).copy()
-            return preview_df.where(pd.notnull(preview_df), None).to_dict(orient="records")
+            head = df.head(max_rows)
+            columns: List[List[Any]] = []
+            for i, dtype in enumerate(head.dtypes):
+                vals = head.iloc[:, i].tolist()
+                # Convert NaN to None for JSON friendliness; only float/object columns can hold it
+                if pd.api.types.is_float_dtype(dtype) or pd.api.types.is_object_dtype(dtype):
+                    vals = [None if v != v else v for v in vals]
+                columns.append(vals)
+            names = head.columns.tolist()
+            return [dict(zip(names, row)) for row in zip(*columns)]
         except Exception:
             return []
 
-    def _build_columns_info(self, df: pd.DataFrame) -> List[ColumnInfo]:
+    def _build_columns_info(self, df: pd.DataFrame, sample_size: int = 5) -> List[ColumnInfo]:
+        # Frame-wide counts in one vectorized pass each
+        null_counts = df.isna().sum().tolist()
+        unique_counts = df.nunique(dropna=True).tolist()
+        head = df.head(50)
+
         infos: List[ColumnInfo] = []
-        for col in df.columns.tolist():
-            series = df[col]
-            sample_vals = series.dropna().unique().tolist()[:5]
+        for i, (col, null_count, unique_count) in enumerate(zip(df.columns.tolist(), null_counts, unique_counts)):
+            # Samples come from the head slice; only rare-valued columns rescan in full
+            sample_vals = head.iloc[:, i].dropna().unique().tolist()[:sample_size]
+            if len(sample_vals) < min(sample_size, int(unique_count)):
+                sample_vals = df.iloc[:, i].dropna().unique().tolist()[:sample_size]
             # Ensure JSON-friendly samples
             sample_vals = [self._json_safe(v) for v in sample_vals]
 
-            dtype = str(series.dtype)
-            null_count = int(series.isna().sum())
-            unique_count = int(series.nunique(dropna=True))
-
             infos.append(
                 ColumnInfo(
                     name=str(col),
-                    dtype=dtype,
+                    dtype=str(df.dtypes.iloc[i]),
                     sample_values=sample_vals,
-                    null_count=null_count,
-                    unique_count=unique_count,
+                    null_count=int(null_count),
+                    unique_count=int(unique_count),
                 )
             )
         return infos
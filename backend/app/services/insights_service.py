@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import re
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from starlette import status
 from pydantic import BaseModel, ValidationError
 
@@ -28,12 +34,41 @@ from app.storage.model_store import ModelStore
 logger = get_logger(__name__)
 
 
+_DATASET_PROMPT_PREFIX = (
+    "You are an experienced data analyst reviewing a dataset summary. "
+    "Use only the facts provided below. Do not infer, assume, or introduce any information that is not explicitly stated. "
+    "Your task is to describe both the structure of the dataset and what it appears to be about, based strictly on the given facts. "
+    "Return valid JSON with exactly two keys: summary and explanation. "
+    "The summary should be a clear, high-level overview of the dataset in about 100 words (80–120 words), "
+    "including what the dataset seems to represent or analyze. "
+    "The explanation should be 2 to 4 concise sentences and must explicitly mention: number of rows, number of columns, "
+    "the target variable, percentage of missing values, and class balance. "
+    "Do not add new metrics, features, or numbers, and do not speculate beyond the provided facts. "
+    "FACTS="
+)
+
+_TRAINING_PROMPT_PREFIX = (
+    "You are a data analyst. Use ONLY the facts provided. "
+    "Return JSON with keys: summary, metrics_summary. "
+    "summary: <=2 sentences. "
+    "metrics_summary: 1-2 sentences and must cite accuracy/precision/recall/f1 if present. "
+    "Do not add new numbers or features. "
+    "FACTS="
+)
+
+
+def _facts_json(facts: Dict[str, Any]) -> str:
+    # Real JSON (not a Python repr) so the model reads the same format it is asked to return
+    return orjson.dumps(facts, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+
+
 @dataclass(frozen=True)
 class InsightsService:
     settings: Settings
     dataset_store: DatasetStore
     metadata_store: MetadataStore
     model_store: ModelStore
+    llm_service: LLMService
 
     async def dataset_summary(self, upload_id: str) -> DatasetSummaryResponse:
         prep = self.metadata_store.read_preprocess_metadata(upload_id)
@@ -45,16 +80,20 @@ class InsightsService:
             )
 
         cached = prep.get("dataset_summary")
-        if isinstance(cached, dict):
+        cache_key = self._summary_cache_key(prep)
+        if isinstance(cached, dict) and cache_key is not None and prep.get("dataset_summary_key") == cache_key:
             try:
                 return DatasetSummaryResponse(**cached)
             except Exception:
                 pass
 
-        return self.build_dataset_summary(upload_id)
+        # Parquet scan, pattern mining and the LLM call all block; keep them off the event loop
+        return await asyncio.to_thread(self.build_dataset_summary, upload_id)
 
-    def build_dataset_summary(self, upload_id: str) -> DatasetSummaryResponse:
-        prep = self.metadata_store.read_preprocess_metadata(upload_id)
+    def build_dataset_summary(self, upload_id: str, prep: Optional[Dict[str, Any]] = None) -> DatasetSummaryResponse:
+        # Callers that already hold the preprocess metadata (training) pass it in
+        if prep is None:
+            prep = self.metadata_store.read_preprocess_metadata(upload_id)
         if prep is None:
             raise AppError(
                 "Dataset not preprocessed. Please run preprocess step first.",
@@ -78,25 +117,28 @@ class InsightsService:
                 code="processed_file_missing",
             )
 
-        df = self.dataset_store.load_processed_dataframe(processed_path)
         target_column = str(prep.get("target_column") or "")
-        if not target_column or target_column not in df.columns:
-            raise AppError(
-                "Target column not found in processed dataset.",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                code="target_missing",
-            )
-
         excluded = set([str(x) for x in (prep.get("excluded_columns") or []) if x])
         if target_column in excluded:
             excluded.remove(target_column)
-        df_summary = df.drop(columns=list(excluded), errors="ignore")
-
-        stats, patterns, risks = self._build_dataset_insights(
-            df_summary, target_column, upload_id, excluded
-        )
 
-        llm = LLMService(settings=self.settings)
+        # Decide columns from the Parquet schema; excluded columns are never decoded
+        with self.dataset_store.open_processed(processed_path) as pf:
+            names = pf.schema_arrow.names
+            if not target_column or target_column not in names:
+                raise AppError(
+                    "Target column not found in processed dataset.",
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    code="target_missing",
+                )
+            needed = [c for c in names if c not in excluded]
+            df_summary = pf.read(columns=needed, use_threads=True).to_pandas(self_destruct=True)
+
+        df_summary = self._downcast_for_insights(df_summary, target_column)
+        column_kinds = self._column_kinds(prep, df_summary, target_column)
+        stats, patterns, risks = self._build_dataset_insights(df_summary, target_column, column_kinds, excluded)
+
+        llm = self.llm_service
         logger.info(
             "dataset_summary_llm_start",
             extra={"upload_id": upload_id, "llm_enabled": llm.is_enabled(), "llm_model": llm.model_name()},
@@ -112,7 +154,7 @@ class InsightsService:
             extra={"upload_id": upload_id, "llm_used": llm_used, "llm_model": llm.model_name()},
         )
 
-        return DatasetSummaryResponse(
+        response = DatasetSummaryResponse(
             upload_id=upload_id,
             summary=summary,
             explanation=explanation,
@@ -123,6 +165,29 @@ class InsightsService:
             llm_model=llm.model_name(),
         )
 
+        # Persist for later /dataset-summary calls; the key invalidates it if the data changes
+        try:
+            self.metadata_store.update_preprocess_metadata(
+                upload_id,
+                {"dataset_summary": response.model_dump(), "dataset_summary_key": self._summary_cache_key(prep)},
+            )
+        except Exception:
+            logger.warning("dataset_summary_cache_write_failed", extra={"upload_id": upload_id})
+
+        return response
+
+    def _summary_cache_key(self, prep: Dict[str, Any]) -> Optional[str]:
+        processed_path_str = prep.get("processed_path")
+        if not processed_path_str:
+            return None
+        try:
+            mtime_ns = self.dataset_store.path_from_string(processed_path_str).stat().st_mtime_ns
+        except OSError:
+            return None
+        excluded = sorted(str(x) for x in (prep.get("excluded_columns") or []) if x)
+        raw = "\x1f".join([str(mtime_ns), str(prep.get("target_column") or ""), *excluded])
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
     async def training_summary(self, model_id: str) -> TrainingSummaryResponse:
         meta = self.metadata_store.read_model_metadata(model_id)
         if meta is None:
@@ -143,8 +208,8 @@ class InsightsService:
 
         risks = self._training_risks(metrics)
 
-        llm = LLMService(settings=self.settings)
-        summary, metrics_summary, llm_used = self._training_llm_summary(
+        llm = self.llm_service
+        summary, metrics_summary, llm_used = await self._training_llm_summary(
             llm=llm,
             model_name=str(meta.get("model_name") or "model"),
             target=str(meta.get("target_column") or "target"),
@@ -163,22 +228,36 @@ class InsightsService:
             llm_model=llm.model_name(),
         )
 
+    def _downcast_for_insights(self, df: pd.DataFrame, target_column: str) -> pd.DataFrame:
+        # Narrower numerics halve the bytes moved by the stats/correlation passes; float32 is
+        # plenty for reported figures. The target keeps its dtype so class labels print as before.
+        casts: Dict[Any, Any] = {}
+        for col, dtype in df.dtypes.items():
+            if col == target_column:
+                continue
+            if dtype == np.float64:
+                casts[col] = np.float32
+            elif dtype == np.int64:
+                casts[col] = pd.to_numeric(df[col], downcast="integer").dtype
+        return df.astype(casts) if casts else df
+
     def _build_dataset_insights(
         self,
         df: pd.DataFrame,
         target_column: str,
-        upload_id: str,
+        column_kinds: Tuple[List[str], List[str]],
         excluded: Optional[set] = None,
     ) -> Tuple[DatasetSummaryStats, List[str], List[str]]:
         rows, cols = int(df.shape[0]), int(df.shape[1])
-        missing_cells = int(df.isna().sum().sum())
+        null_by_col = df.isna().sum()
+        missing_cells = int(null_by_col.sum())
         total_cells = max(1, rows * cols)
         missing_pct = float(missing_cells / total_cells)
 
         target_series = df[target_column]
         class_balance = self._class_balance(target_series)
 
-        missing_by_col = df.isna().sum().sort_values(ascending=False)
+        missing_by_col = null_by_col.sort_values(ascending=False)
         top_missing = [
             ColumnMissing(
                 column=str(col),
@@ -189,14 +268,14 @@ class InsightsService:
             if int(cnt) > 0
         ]
 
-        patterns = self._detect_patterns(df, target_column)
+        patterns = self._detect_patterns(df, target_column, column_kinds)
         risks = self._dataset_risks(
             df=df,
             target_column=target_column,
             missing_pct=missing_pct,
             class_balance=class_balance,
             rows=rows,
-            upload_id=upload_id,
+            unique_counts=df.nunique(dropna=True),
             excluded=excluded,
         )
 
@@ -215,11 +294,21 @@ class InsightsService:
         clean = series.dropna()
         if clean.empty:
             return []
-        counts = clean.value_counts(dropna=True)
-        total = int(counts.sum())
+        try:
+            # Counted in Arrow; only the distinct labels are boxed into Python objects
+            vc = pc.value_counts(pa.Array.from_pandas(clean))
+            pairs = sorted(
+                zip(vc.field("values").to_pylist(), vc.field("counts").to_pylist()),
+                key=lambda x: x[1],
+                reverse=True,
+            )
+        except (pa.ArrowException, TypeError, ValueError):
+            # Mixed-type object columns can't be converted to a single Arrow type
+            pairs = list(clean.value_counts(dropna=True).items())
+        total = int(sum(int(cnt) for _label, cnt in pairs))
         return [
             ClassBalance(label=str(label), count=int(cnt), pct=float(cnt / total))
-            for label, cnt in counts.items()
+            for label, cnt in pairs
         ]
 
     def _target_as_numeric(self, series: pd.Series) -> Optional[pd.Series]:
@@ -230,14 +319,44 @@ class InsightsService:
             return clean.astype(int)
         if pd.api.types.is_numeric_dtype(clean):
             return clean.astype(float)
-        # Handle simple binary categories
-        uniques = clean.astype(str).unique().tolist()
-        if len(uniques) == 2:
-            mapping = {uniques[0]: 0.0, uniques[1]: 1.0}
-            return clean.astype(str).map(mapping).astype(float)
+        # Handle simple binary categories (vectorized codes; already-string columns skip the cast)
+        if isinstance(clean.dtype, pd.CategoricalDtype):
+            cat = pd.Categorical(clean).remove_unused_categories()
+        elif pd.api.types.is_string_dtype(clean):
+            cat = pd.Categorical(clean)
+        else:
+            cat = pd.Categorical(clean.astype(str))
+        if len(cat.categories) == 2:
+            return pd.Series(cat.codes.astype(np.float32), index=clean.index)
         return None
 
-    def _detect_patterns(self, df: pd.DataFrame, target_column: str) -> List[str]:
+    def _column_kinds(
+        self, prep: Dict[str, Any], df: pd.DataFrame, target_column: str
+    ) -> Tuple[List[str], List[str]]:
+        """
+        (numeric, categorical) feature columns present in df. Uses the split persisted at
+        preprocess time; older metadata without it falls back to inspecting dtypes.
+        """
+        numeric = prep.get("numeric_cols")
+        categorical = prep.get("categorical_cols")
+        present = set(df.columns)
+        if isinstance(numeric, list) and isinstance(categorical, list):
+            return (
+                [c for c in numeric if c in present and c != target_column],
+                [c for c in categorical if c in present and c != target_column],
+            )
+        numeric_out: List[str] = []
+        categorical_out: List[str] = []
+        for c, dtype in df.dtypes.items():
+            if c == target_column:
+                continue
+            (numeric_out if pd.api.types.is_numeric_dtype(dtype) else categorical_out).append(c)
+        return numeric_out, categorical_out
+
+    def _detect_patterns(
+        self, df: pd.DataFrame, target_column: str, column_kinds: Tuple[List[str], List[str]]
+    ) -> List[str]:
+        numeric_cols, cat_cols = column_kinds
         patterns: List[str] = []
         target_num = self._target_as_numeric(df[target_column])
         overall_rate = None
@@ -249,40 +368,32 @@ class InsightsService:
 
         # Numeric correlations
         if target_num is not None:
-            numeric_cols = [
-                c
-                for c in df.columns
-                if c != target_column and pd.api.types.is_numeric_dtype(df[c])
-            ]
-            corrs: List[Tuple[str, float]] = []
-            for col in numeric_cols:
+            if numeric_cols:
+                # One aligned pass over all numeric columns (same index alignment as Series.corr)
                 try:
-                    corr = float(df[col].corr(target_num))
+                    corrs = df[numeric_cols].corrwith(target_num).dropna()
                 except Exception:
-                    continue
-                if np.isnan(corr):
-                    continue
-                corrs.append((col, corr))
-            corrs.sort(key=lambda x: abs(x[1]), reverse=True)
-            for col, corr in corrs[:3]:
-                patterns.append(f"{col} correlates with target at {corr:.2f}.")
+                    corrs = pd.Series(dtype=float)
+                top = corrs.reindex(corrs.abs().sort_values(ascending=False).index).head(3)
+                for col, corr in top.items():
+                    patterns.append(f"{col} correlates with target at {float(corr):.2f}.")
 
         # Categorical uplift patterns
         if overall_rate is not None:
-            cat_cols = [
-                c
-                for c in df.columns
-                if c != target_column and not pd.api.types.is_numeric_dtype(df[c])
-            ]
             cat_patterns: List[Tuple[str, float]] = []
+            # Target aligned to the frame index (NaN where the target is missing)
+            target_full = target_num.reindex(df.index)
             for col in cat_cols:
                 try:
-                    counts = df[col].astype(str).value_counts()
-                    for val, cnt in counts.head(5).items():
-                        if int(cnt) < 5:
-                            continue
-                        mask = df[col].astype(str) == val
-                        rate = float(target_num[mask].mean())
+                    # Rate and count for every value in one grouped pass
+                    agg = (
+                        target_full.groupby(df[col], observed=True, dropna=False, sort=False)
+                        .agg(["mean", "count"])
+                        .nlargest(5, "count")
+                    )
+                    agg = agg[agg["count"] >= 5]
+                    for val, rate in agg["mean"].items():
+                        rate = float(rate)
                         diff = rate - overall_rate
                         cat_patterns.append((f"{col}={val} shows churn rate {rate:.2f}.", diff))
                 except Exception:
@@ -300,7 +411,7 @@ class InsightsService:
         missing_pct: float,
         class_balance: List[ClassBalance],
         rows: int,
-        upload_id: str,
+        unique_counts: pd.Series,
         excluded: Optional[set] = None,
     ) -> List[str]:
         risks: List[str] = []
@@ -317,31 +428,24 @@ class InsightsService:
             if max_share >= 0.75:
                 risks.append("Class imbalance detected; consider stratified evaluation or rebalancing.")
 
-        upload_meta = self.metadata_store.read_upload_metadata(upload_id) or {}
-        cols_info = upload_meta.get("columns") or []
-        for col in cols_info:
-            try:
-                name = str(col.get("name") or "")
-                unique_count = int(col.get("unique_count") or 0)
-            except Exception:
-                continue
-            if name in excluded:
-                continue
-            if unique_count >= 100:
-                risks.append(f"High-cardinality feature '{name}' may overfit.")
-                break
+        high_card = unique_counts[unique_counts >= 100].drop(labels=list(excluded), errors="ignore")
+        if not high_card.empty:
+            risks.append(f"High-cardinality feature '{high_card.index[0]}' may overfit.")
 
-        target_lower = target_column.lower()
+        # One search per name. The anchored lookahead gives the target keyword priority over
+        # identifier hints anywhere in the same name (group 1 set => target keyword).
+        leakage_re = re.compile(rf"^(?=.*({re.escape(target_column)}))|id|email|phone", re.IGNORECASE | re.DOTALL)
         for col in df.columns:
-            name = str(col).lower()
             if col == target_column:
                 continue
-            if target_lower in name:
+            m = leakage_re.search(str(col))
+            if m is None:
+                continue
+            if m.group(1) is not None:
                 risks.append(f"Potential leakage: feature '{col}' includes target keyword.")
-                break
-            if any(k in name for k in ("id", "email", "phone")):
+            else:
                 risks.append(f"Identifier-like feature '{col}' may leak or reduce generalization.")
-                break
+            break
 
         return risks[:5]
 
@@ -401,18 +505,7 @@ class InsightsService:
         #     f"FACTS={facts}"
         # )
 
-        prompt = (
-            "You are an experienced data analyst reviewing a dataset summary. "
-            "Use only the facts provided below. Do not infer, assume, or introduce any information that is not explicitly stated. "
-            "Your task is to describe both the structure of the dataset and what it appears to be about, based strictly on the given facts. "
-            "Return valid JSON with exactly two keys: summary and explanation. "
-            "The summary should be a clear, high-level overview of the dataset in about 100 words (80–120 words), "
-            "including what the dataset seems to represent or analyze. "
-            "The explanation should be 2 to 4 concise sentences and must explicitly mention: number of rows, number of columns, "
-            "the target variable, percentage of missing values, and class balance. "
-            "Do not add new metrics, features, or numbers, and do not speculate beyond the provided facts. "
-            f"FACTS={facts}"
-        )
+        prompt = _DATASET_PROMPT_PREFIX + _facts_json(facts)
 
         fallback_summary = (
             f"Dataset has {stats.rows} rows and {stats.cols} columns with target '{stats.target_column}'. "
@@ -445,7 +538,7 @@ class InsightsService:
             return fallback_summary, fallback_expl, False
         return summary, explanation, True
 
-    def _training_llm_summary(
+    async def _training_llm_summary(
         self,
         llm: LLMService,
         model_name: str,
@@ -466,14 +559,7 @@ class InsightsService:
             "risks": risks,
         }
 
-        prompt = (
-            "You are a data analyst. Use ONLY the facts provided. "
-            "Return JSON with keys: summary, metrics_summary. "
-            "summary: <=2 sentences. "
-            "metrics_summary: 1-2 sentences and must cite accuracy/precision/recall/f1 if present. "
-            "Do not add new numbers or features. "
-            f"FACTS={facts}"
-        )
+        prompt = _TRAINING_PROMPT_PREFIX + _facts_json(facts)
 
         fallback_summary = (
             f"The {model_name} model predicts '{target}' using {len(top_features)} top-ranked features."
@@ -489,7 +575,7 @@ class InsightsService:
             else "Metrics are not fully available for this run."
         )
 
-        data = llm.generate_json(prompt) if llm.is_enabled() else None
+        data = await llm.generate_json_async(prompt) if llm.is_enabled() else None
         if not isinstance(data, dict):
             return fallback_summary, fallback_metrics, False
         try:
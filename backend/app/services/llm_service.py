@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import http.client
 import json
-import urllib.request
+import queue
+import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
 
 from app.core.config import Settings
 from app.core.logging import get_logger
@@ -12,6 +19,169 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 
 
+# Keep-alive connections to the Ollama server, shared across requests (one pool per base URL)
+_POOL_SIZE = 8
+_POOLS: Dict[str, "queue.LifoQueue[http.client.HTTPConnection]"] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool_for(base_url: str) -> "queue.LifoQueue[http.client.HTTPConnection]":
+    with _POOLS_LOCK:
+        pool = _POOLS.get(base_url)
+        if pool is None:
+            pool = _POOLS[base_url] = queue.LifoQueue(maxsize=_POOL_SIZE)
+        return pool
+
+
+def _acquire(base_url: str, timeout: float) -> http.client.HTTPConnection:
+    try:
+        conn = _pool_for(base_url).get_nowait()
+    except queue.Empty:
+        parts = urlsplit(base_url)
+        conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        return conn_cls(parts.hostname or "localhost", parts.port, timeout=timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _release(base_url: str, conn: http.client.HTTPConnection) -> None:
+    try:
+        _pool_for(base_url).put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def _send(base_url: str, path: str, body: bytes, timeout: float) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+    """
+    POST over a pooled keep-alive connection and return it with the response headers read.
+    A request on a reused socket that the server already closed is retried once on a fresh one.
+    """
+    for attempt in range(2):
+        conn = _acquire(base_url, timeout)
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            return conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if reused and attempt == 0:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+    raise RuntimeError("unreachable")
+
+
+def _finish(base_url: str, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+    if resp.will_close:
+        conn.close()
+    else:
+        _release(base_url, conn)
+
+
+def _post_json(base_url: str, path: str, body: bytes, timeout: float) -> Tuple[int, bytes]:
+    conn, resp = _send(base_url, path, body, timeout)
+    try:
+        raw = resp.read()
+    except Exception:
+        conn.close()
+        raise
+    _finish(base_url, conn, resp)
+    return resp.status, raw
+
+
+def _iter_lines(base_url: str, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> Iterator[bytes]:
+    # The connection only goes back to the pool once the body was read to the end
+    complete = False
+    try:
+        for line in resp:
+            yield line
+        complete = True
+    finally:
+        if complete:
+            _finish(base_url, conn, resp)
+        else:
+            conn.close()
+
+
+class _StringFieldStream:
+    """
+    Incrementally extracts one top-level string field from a JSON document that arrives
+    in fragments, passing newly decoded text to on_text as soon as it is complete.
+    """
+
+    def __init__(self, field: str, on_text: Callable[[str], None]) -> None:
+        self._start_re = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._on_text = on_text
+        self._buf = ""
+        self._pos = -1  # index just past the text already emitted; -1 until the field starts
+        self._closed = False
+
+    def feed(self, fragment: str) -> None:
+        if self._closed:
+            return
+        self._buf += fragment
+        if self._pos < 0:
+            m = self._start_re.search(self._buf)
+            if m is None:
+                return
+            self._pos = m.end()
+
+        i = self._pos
+        end = len(self._buf)
+        while i < end:
+            ch = self._buf[i]
+            if ch == '"':
+                self._closed = True
+                break
+            if ch == "\\":
+                # Wait for the whole escape sequence; a \uXXXX surrogate pair is kept together
+                step = 6 if self._buf[i + 1 : i + 2] == "u" else 2
+                if step == 6 and self._buf[i + 2 : i + 4].lower() in ("d8", "d9", "da", "db"):
+                    step = 12
+                if i + step > end:
+                    break
+                i += step
+                continue
+            i += 1
+
+        if i > self._pos:
+            try:
+                text = json.loads('"' + self._buf[self._pos : i] + '"')
+            except ValueError:
+                text = ""
+            self._pos = i
+            if text:
+                self._on_text(text)
+
+
+# Parsed responses keyed by model/options/prompt. Generation runs with temperature 0 and a
+# fixed seed, so a repeated prompt would produce the same output anyway.
+_RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    with _RESPONSE_CACHE_LOCK:
+        hit = _RESPONSE_CACHE.get(key)
+        if hit is None:
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return dict(hit)
+
+
+def _cache_put(key: str, value: Dict[str, Any]) -> None:
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = dict(value)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
 @dataclass(frozen=True)
 class LLMService:
     settings: Settings
@@ -31,28 +201,17 @@ class LLMService:
             logger.info("llm_disabled")
             return None
 
-        payload = {
-            "model": self.settings.ollama_model,
-            "prompt": prompt,
-            "format": "json",
-            "stream": False,
-            "options": {
-                "temperature": 0,
-                "top_p": 1,
-                "seed": int(self.settings.ollama_seed),
-                "num_predict": int(self.settings.ollama_max_tokens),
-            },
-        }
+        cache_key = self._cache_key(prompt)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.info("llm_cache_hit")
+            return cached
 
-        url = self.settings.ollama_base_url.rstrip("/") + "/api/generate"
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        base_url = self.settings.ollama_base_url.rstrip("/")
+        data = self._payload(prompt, stream=False)
 
         try:
-            with urllib.request.urlopen(req, timeout=self.settings.ollama_timeout_s) as resp:
-                status_code = getattr(resp, "status", None)
-                raw_bytes = resp.read()
-                raw = raw_bytes.decode("utf-8")
+            status_code, raw_bytes = _post_json(base_url, self._generate_path(base_url), data, self.settings.ollama_timeout_s)
             logger.info(
                 "llm_response_received",
                 extra={
@@ -60,12 +219,120 @@ class LLMService:
                     "response_bytes": len(raw_bytes),
                 },
             )
-            parsed = json.loads(raw)
+            if status_code >= 400:
+                logger.warning("llm_http_error", extra={"status_code": status_code})
+                return None
+            parsed = json.loads(raw_bytes.decode("utf-8"))
             text = parsed.get("response", "")
             if not text:
                 logger.warning("llm_empty_response_field")
                 return None
-            return json.loads(text)
+            result = json.loads(text)
+            if isinstance(result, dict):
+                _cache_put(cache_key, result)
+            return result
+        except Exception as exc:
+            logger.exception("llm_generate_failed", extra={"error_type": type(exc).__name__})
+            return None
+
+    def generate_json_stream(
+        self,
+        prompt: str,
+        *,
+        field: str,
+        on_text: Callable[[str], None],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Like generate_json, but reads Ollama's streamed output and passes the text of the given
+        top-level string field to on_text while it is being generated.
+        Returns the full parsed JSON dict or None on failure.
+        """
+        if not self.is_enabled():
+            logger.info("llm_disabled")
+            return None
+
+        cache_key = self._cache_key(prompt)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.info("llm_cache_hit")
+            return cached
+
+        base_url = self.settings.ollama_base_url.rstrip("/")
+        data = self._payload(prompt, stream=True)
+        field_stream: Optional[_StringFieldStream] = _StringFieldStream(field, on_text)
+
+        try:
+            conn, resp = _send(base_url, self._generate_path(base_url), data, self.settings.ollama_timeout_s)
+            if resp.status >= 400:
+                conn.close()
+                logger.warning("llm_http_error", extra={"status_code": resp.status})
+                return None
+
+            parts = []
+            for line in _iter_lines(base_url, conn, resp):
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                fragment = chunk.get("response", "")
+                if fragment:
+                    parts.append(fragment)
+                if fragment and field_stream is not None:
+                    try:
+                        field_stream.feed(fragment)
+                    except Exception:
+                        # A failing consumer only loses the live text; the full response is still parsed
+                        logger.exception("llm_stream_callback_failed")
+                        field_stream = None
+
+            text = "".join(parts)
+            logger.info("llm_stream_completed", extra={"response_chars": len(text)})
+            if not text:
+                logger.warning("llm_empty_response_field")
+                return None
+            result = json.loads(text)
+            if isinstance(result, dict):
+                _cache_put(cache_key, result)
+            return result
         except Exception as exc:
             logger.exception("llm_generate_failed", extra={"error_type": type(exc).__name__})
             return None
+
+    def _payload(self, prompt: str, *, stream: bool) -> bytes:
+        payload = {
+            "model": self.settings.ollama_model,
+            "prompt": prompt,
+            "format": "json",
+            "stream": stream,
+            "options": {
+                "temperature": 0,
+                "top_p": 1,
+                "seed": int(self.settings.ollama_seed),
+                "num_predict": int(self.settings.ollama_max_tokens),
+            },
+        }
+        return json.dumps(payload).encode("utf-8")
+
+    def _generate_path(self, base_url: str) -> str:
+        return urlsplit(base_url).path + "/api/generate"
+
+    def _cache_key(self, prompt: str) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        for part in (
+            self.settings.ollama_base_url,
+            self.settings.ollama_model,
+            str(int(self.settings.ollama_seed)),
+            str(int(self.settings.ollama_max_tokens)),
+        ):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        h.update(prompt.encode("utf-8"))
+        return h.hexdigest()
+
+    async def generate_json_async(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Same as generate_json, run on a worker thread so async handlers don't block the event loop.
+        """
+        if not self.is_enabled():
+            logger.info("llm_disabled")
+            return None
+        return await asyncio.to_thread(self.generate_json, prompt)
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import functools
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from xgboost import DMatrix
 from starlette import status
 from pydantic import BaseModel, ValidationError
 
 from app.core.config import Settings
 from app.core.errors import AppError
-from app.ml.predictor import predict_with_pipeline
+from app.ml.predictor import (
+    BaseGroups,
+    PredictionBatcher,
+    base_feature_names,
+    group_base_features,
+    inference_dmatrix,
+    loaded_model,
+    score_batch,
+)
 from app.schemas.common import RiskLevel
 from app.schemas.prediction import (
     PredictRequest,
@@ -24,6 +36,76 @@ from app.storage.dataset_store import DatasetStore
 from app.storage.metadata_store import MetadataStore
 from app.storage.model_store import ModelStore
 
+# Per-service cap on cached batchers (PredictionService.batchers)
+_MAX_BATCHERS = 8
+
+# Rule-based actions per risk bucket, built once (the models are never mutated after this)
+_ACTIONS_BY_RISK: Dict[RiskLevel, Tuple[RecommendedAction, ...]] = {
+    "High": (
+        RecommendedAction(
+            action="Trigger proactive retention outreach within 24 hours",
+            reason="High churn probability indicates urgent intervention is required.",
+            priority=5,
+            expected_impact="Reduce immediate churn risk",
+        ),
+        RecommendedAction(
+            action="Offer a targeted retention incentive (plan upgrade/discount)",
+            reason="Incentives can increase perceived value and reduce churn intent.",
+            priority=4,
+            expected_impact="Improve short-term retention",
+        ),
+        RecommendedAction(
+            action="Assign customer success call to identify pain points",
+            reason="Direct feedback helps address dissatisfaction drivers.",
+            priority=4,
+            expected_impact="Increase engagement and satisfaction",
+        ),
+    ),
+    "Medium": (
+        RecommendedAction(
+            action="Send personalized engagement campaign",
+            reason="Medium risk customers may respond to engagement and nudges.",
+            priority=3,
+            expected_impact="Increase engagement",
+        ),
+        RecommendedAction(
+            action="Monitor usage/transactions for early warning signals",
+            reason="Early detection helps prevent movement to high risk.",
+            priority=3,
+            expected_impact="Prevent risk escalation",
+        ),
+    ),
+    "Low": (
+        RecommendedAction(
+            action="Maintain standard customer communication cadence",
+            reason="Low churn probability suggests no immediate intervention is required.",
+            priority=2,
+            expected_impact="Sustain retention",
+        ),
+        RecommendedAction(
+            action="Continue monitoring periodic risk updates",
+            reason="Customer behavior can change over time; periodic checks are recommended.",
+            priority=2,
+            expected_impact="Early detection of changes",
+        ),
+    ),
+}
+
+
+class _PredictionLLMOutput(BaseModel):
+    summary: str
+    confidence_note: Optional[str] = None
+
+
+def _risk_from_probability(probability: float) -> RiskLevel:
+    # Deterministic and easy to justify in viva/report:
+    # <0.33 Low, <0.66 Medium, otherwise High
+    if probability < 0.33:
+        return "Low"
+    if probability < 0.66:
+        return "Medium"
+    return "High"
+
 
 @dataclass(frozen=True)
 class PredictionService:
@@ -31,28 +113,88 @@ class PredictionService:
     dataset_store: DatasetStore
     model_store: ModelStore
     metadata_store: MetadataStore
+    llm_service: LLMService
+    # Bounded pool for the blocking parts of /predict (artifact I/O, inference, contribs, LLM)
+    executor: Executor
+    # model_id -> batcher holding the loaded pipeline (LRU). Only touched on the event loop.
+    # Scoped to the service (one per app) because each batcher scores on this executor,
+    # which is shut down with the app.
+    batchers: "OrderedDict[str, PredictionBatcher]" = field(default_factory=OrderedDict)
 
     async def predict(self, req: PredictRequest) -> PredictResponse:
-        return self._predict_impl(req)
+        loop = asyncio.get_running_loop()
+        if self.settings.predict_batch_ms <= 0:
+            return await loop.run_in_executor(self.executor, self._predict_impl, req)
+
+        meta, feature_columns = await loop.run_in_executor(self.executor, self._read_model_meta, req.model_id)
+        batcher = self.batchers.get(req.model_id)
+        if batcher is None:
+            pipeline = await loop.run_in_executor(self.executor, self.model_store.load_model, req.model_id)
+            batcher = self._batcher(req.model_id, pipeline)
+        else:
+            self.batchers.move_to_end(req.model_id)
+        df = self._input_frame(req, feature_columns)
+        try:
+            pred_label, prob, contrib_row, contrib_groups = await batcher.submit(df)
+        except AppError:
+            raise
+        except Exception as e:
+            raise self._prediction_failed(e)
 
-    def predict_with_progress(
-        self,
-        req: PredictRequest,
-        emit_progress: Optional[Callable[[int, str], None]] = None,
-    ) -> PredictResponse:
-        return self._predict_impl(req, emit_progress=emit_progress)
+        risk_level: RiskLevel = _risk_from_probability(prob)
+        compute_factors = functools.partial(
+            self._compute_key_factors,
+            pipeline=batcher.pipeline,
+            df=df,
+            feature_columns=feature_columns,
+            model_meta=meta,
+            contrib_row=contrib_row,
+            contrib_groups=contrib_groups,
+        )
+        key_factors = await loop.run_in_executor(self.executor, compute_factors)
 
-    def _predict_impl(
+        llm_model_name = self.llm_service.model_name()
+        if not self.llm_service.is_enabled():
+            explanation = self._deterministic_explanation(prob, risk_level, key_factors, llm_model_name)
+            actions = self._deterministic_actions(risk_level=risk_level)
+            return self._response(req, pred_label, prob, risk_level, explanation, actions)
+
+        # The LLM wait runs on asyncio's default threads, keeping predict workers free meanwhile
+        explanation = await self._llm_explanation_async(
+            probability=prob,
+            risk_level=risk_level,
+            key_factors=key_factors,
+            llm_model_name=llm_model_name,
+        )
+        actions = self._deterministic_actions(risk_level=risk_level)
+        return self._response(req, pred_label, prob, risk_level, explanation, actions)
+
+    def predict_with_progress(
         self,
         req: PredictRequest,
         emit_progress: Optional[Callable[[int, str], None]] = None,
+        emit_token: Optional[Callable[[str], None]] = None,
     ) -> PredictResponse:
-        def _emit(pct: int, message: str) -> None:
-            if emit_progress:
-                emit_progress(pct, message)
+        return self._predict_impl(req, emit_progress=emit_progress, emit_token=emit_token)
+
+    def _batcher(self, model_id: str, pipeline: Any) -> PredictionBatcher:
+        # Model artifacts are immutable per model_id, so the batcher can keep its pipeline.
+        # A concurrent request may have registered one while this pipeline was loading.
+        batcher = self.batchers.get(model_id)
+        if batcher is None:
+            batcher = PredictionBatcher(
+                pipeline,
+                max_wait_ms=self.settings.predict_batch_ms,
+                executor=self.executor,
+                device=self.settings.predict_device,
+            )
+            self.batchers[model_id] = batcher
+            if len(self.batchers) > _MAX_BATCHERS:
+                self.batchers.popitem(last=False)
+        return batcher
 
-        _emit(5, "Validating model metadata")
-        meta = self.metadata_store.read_model_metadata(req.model_id)
+    def _read_model_meta(self, model_id: str) -> Tuple[Dict[str, Any], List[str]]:
+        meta = self.metadata_store.read_model_metadata(model_id)
         if meta is None:
             raise AppError(
                 "Unknown model_id. Please train the model again.",
@@ -69,21 +211,14 @@ class PredictionService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 code="model_metadata_incomplete",
             )
-
-        _emit(15, "Loading model")
-        pipeline = self.model_store.load_model(req.model_id)
-
-        # Build a single-row dataframe in the exact feature order
-        row: Dict[str, Any] = {}
-        missing: List[str] = []
-        _emit(25, "Preparing input features")
-
-        for col in feature_columns:
-            if col in req.input_data:
-                row[col] = req.input_data[col]
-            else:
-                missing.append(col)
-
+        return meta, feature_columns
+
+    def _input_frame(self, req: PredictRequest, feature_columns: List[str]) -> pd.DataFrame:
+        # Build a single-row dataframe in the exact feature order. Filling one object row and
+        # wrapping it skips the per-column dtype inference of the list-of-dicts constructor;
+        # the preprocessor casts numeric columns itself.
+        data = req.input_data
+        missing = [c for c in feature_columns if c not in data]
         if missing:
             raise AppError(
                 "Missing required input fields for prediction.",
@@ -92,22 +227,82 @@ class PredictionService:
                 details={"missing": missing},
             )
 
-        df = pd.DataFrame([row], columns=feature_columns)
+        # fromiter keeps each input as one object cell (no nested-sequence broadcasting)
+        values = np.fromiter((data[c] for c in feature_columns), dtype=object, count=len(feature_columns))
+        return pd.DataFrame(values.reshape(1, -1), columns=feature_columns, copy=False)
+
+    def _prediction_failed(self, e: Exception) -> AppError:
+        return AppError(
+            "Prediction failed due to an internal error.",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            code="prediction_failed",
+            details={"error": str(e)},
+        )
+
+    def _predict_impl(
+        self,
+        req: PredictRequest,
+        emit_progress: Optional[Callable[[int, str], None]] = None,
+        emit_token: Optional[Callable[[str], None]] = None,
+    ) -> PredictResponse:
+        def _emit(pct: int, message: str) -> None:
+            if emit_progress:
+                emit_progress(pct, message)
+
+        _emit(5, "Validating model metadata")
+        meta, feature_columns = self._read_model_meta(req.model_id)
+
+        _emit(15, "Loading model")
+        pipeline = self.model_store.load_model(req.model_id)
+
+        _emit(25, "Preparing input features")
+        df = self._input_frame(req, feature_columns)
 
         _emit(45, "Running prediction")
+        # Probability and contributions come from the same scoring pass (as in the batched path)
         try:
-            pred_label, prob = predict_with_pipeline(pipeline=pipeline, X=df)
+            probs, contribs, contrib_groups = score_batch(pipeline, df)
         except AppError:
             raise
         except Exception as e:
-            raise AppError(
-                "Prediction failed due to an internal error.",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                code="prediction_failed",
-                details={"error": str(e)},
-            )
+            raise self._prediction_failed(e)
+        prob = float(probs[0])
+        pred_label = int(prob >= 0.5)
+        contrib_row = contribs[0] if contribs is not None else None
+
+        return self._build_response(
+            req,
+            meta,
+            feature_columns,
+            pipeline,
+            df,
+            pred_label,
+            prob,
+            emit_progress,
+            contrib_row=contrib_row,
+            contrib_groups=contrib_groups,
+            emit_token=emit_token,
+        )
 
-        risk_level: RiskLevel = self._risk_from_probability(prob)
+    def _build_response(
+        self,
+        req: PredictRequest,
+        meta: Dict[str, Any],
+        feature_columns: List[str],
+        pipeline: Any,
+        df: pd.DataFrame,
+        pred_label: int,
+        prob: float,
+        emit_progress: Optional[Callable[[int, str], None]] = None,
+        contrib_row: Optional[np.ndarray] = None,
+        contrib_groups: Optional[BaseGroups] = None,
+        emit_token: Optional[Callable[[str], None]] = None,
+    ) -> PredictResponse:
+        def _emit(pct: int, message: str) -> None:
+            if emit_progress:
+                emit_progress(pct, message)
+
+        risk_level: RiskLevel = _risk_from_probability(prob)
 
         _emit(60, "Computing key factors")
         key_factors = self._compute_key_factors(
@@ -115,6 +310,8 @@ class PredictionService:
             df=df,
             feature_columns=feature_columns,
             model_meta=meta,
+            contrib_row=contrib_row,
+            contrib_groups=contrib_groups,
         )
 
         _emit(75, "Generating explanation")
@@ -122,12 +319,24 @@ class PredictionService:
             probability=prob,
             risk_level=risk_level,
             key_factors=key_factors,
-            llm_model_name=LLMService(settings=self.settings).model_name(),
+            llm_model_name=self.llm_service.model_name(),
+            emit_token=emit_token,
         )
         _emit(90, "Building recommendations")
         actions = self._deterministic_actions(risk_level=risk_level)
 
         _emit(95, "Finalizing response")
+        return self._response(req, pred_label, prob, risk_level, explanation, actions)
+
+    def _response(
+        self,
+        req: PredictRequest,
+        pred_label: int,
+        prob: float,
+        risk_level: RiskLevel,
+        explanation: PredictionExplanation,
+        actions: List[RecommendedAction],
+    ) -> PredictResponse:
         return PredictResponse(
             model_id=req.model_id,
             prediction=int(pred_label),
@@ -137,34 +346,53 @@ class PredictionService:
             recommended_actions=actions,
         )
 
-    def _risk_from_probability(self, probability: float) -> RiskLevel:
-        # Deterministic and easy to justify in viva/report:
-        # <0.33 Low, <0.66 Medium, otherwise High
-        if probability < 0.33:
-            return "Low"
-        if probability < 0.66:
-            return "Medium"
-        return "High"
-
     def _llm_explanation(
         self,
         probability: float,
         risk_level: RiskLevel,
         key_factors: List[PredictionFactor],
         llm_model_name: str,
+        emit_token: Optional[Callable[[str], None]] = None,
     ) -> PredictionExplanation:
-        class _PredictionLLMOutput(BaseModel):
-            summary: str
-            confidence_note: Optional[str] = None
-
-        fallback = self._deterministic_explanation(probability, risk_level, key_factors, llm_model_name)
-        llm = LLMService(settings=self.settings)
+        # Facts and prompt are only built when the LLM will actually be called
+        llm = self.llm_service
         if not llm.is_enabled():
-            return fallback
+            return self._deterministic_explanation(probability, risk_level, key_factors, llm_model_name)
+
+        prompt = self._explanation_prompt(probability, risk_level, key_factors)
+        if emit_token is not None:
+            # Summary text is forwarded while the model generates it
+            data = llm.generate_json_stream(prompt, field="summary", on_text=emit_token)
+        else:
+            data = llm.generate_json(prompt)
+        explanation = self._explanation_from_llm(data, key_factors)
+        if explanation is None:
+            return self._deterministic_explanation(probability, risk_level, key_factors, llm_model_name)
+        return explanation
+
+    async def _llm_explanation_async(
+        self,
+        probability: float,
+        risk_level: RiskLevel,
+        key_factors: List[PredictionFactor],
+        llm_model_name: str,
+    ) -> PredictionExplanation:
+        llm = self.llm_service
+        if not llm.is_enabled():
+            return self._deterministic_explanation(probability, risk_level, key_factors, llm_model_name)
 
-        def _word_count(text: str) -> int:
-            return len([w for w in text.strip().split() if w])
+        data = await llm.generate_json_async(self._explanation_prompt(probability, risk_level, key_factors))
+        explanation = self._explanation_from_llm(data, key_factors)
+        if explanation is None:
+            return self._deterministic_explanation(probability, risk_level, key_factors, llm_model_name)
+        return explanation
 
+    def _explanation_prompt(
+        self,
+        probability: float,
+        risk_level: RiskLevel,
+        key_factors: List[PredictionFactor],
+    ) -> str:
         facts = {
             "probability": round(float(probability), 4),
             "risk_level": risk_level,
@@ -179,7 +407,7 @@ class PredictionService:
         #     f"FACTS={facts}"
         # )
 
-        prompt = (
+        return (
             "You are an experienced data analyst interpreting a risk assessment summary. "
             "Use ONLY the facts provided below. Do not introduce new features, metrics, or numbers. "
             "You may explain likely reasons and implications only if they are directly supported by the facts. "
@@ -190,27 +418,32 @@ class PredictionService:
             "Do not speculate beyond the provided information or assume unseen behavior. "
             f"FACTS={facts}"
         )
-        
-        data = llm.generate_json(prompt)
+
+    def _explanation_from_llm(
+        self,
+        data: Any,
+        key_factors: List[PredictionFactor],
+    ) -> Optional[PredictionExplanation]:
+        # None means the caller falls back to the deterministic explanation
         if not isinstance(data, dict):
-            return fallback
+            return None
 
         try:
             parsed = _PredictionLLMOutput.model_validate(data)
         except ValidationError:
-            return fallback
+            return None
 
         summary = parsed.summary.strip()
         confidence_note = parsed.confidence_note.strip() if parsed.confidence_note else None
         if not summary:
-            return fallback
+            return None
 
         return PredictionExplanation(
             summary=summary,
             key_factors=key_factors,
             confidence_note=confidence_note,
             llm_used=True,
-            llm_model=llm.model_name(),
+            llm_model=self.llm_service.model_name(),
         )
 
     def _deterministic_explanation(
@@ -242,56 +475,7 @@ class PredictionService:
 
     def _deterministic_actions(self, risk_level: RiskLevel) -> List[RecommendedAction]:
         # No LLM. These are rule-based actions purely by risk bucket.
-        if risk_level == "High":
-            return [
-                RecommendedAction(
-                    action="Trigger proactive retention outreach within 24 hours",
-                    reason="High churn probability indicates urgent intervention is required.",
-                    priority=5,
-                    expected_impact="Reduce immediate churn risk",
-                ),
-                RecommendedAction(
-                    action="Offer a targeted retention incentive (plan upgrade/discount)",
-                    reason="Incentives can increase perceived value and reduce churn intent.",
-                    priority=4,
-                    expected_impact="Improve short-term retention",
-                ),
-                RecommendedAction(
-                    action="Assign customer success call to identify pain points",
-                    reason="Direct feedback helps address dissatisfaction drivers.",
-                    priority=4,
-                    expected_impact="Increase engagement and satisfaction",
-                ),
-            ]
-        if risk_level == "Medium":
-            return [
-                RecommendedAction(
-                    action="Send personalized engagement campaign",
-                    reason="Medium risk customers may respond to engagement and nudges.",
-                    priority=3,
-                    expected_impact="Increase engagement",
-                ),
-                RecommendedAction(
-                    action="Monitor usage/transactions for early warning signals",
-                    reason="Early detection helps prevent movement to high risk.",
-                    priority=3,
-                    expected_impact="Prevent risk escalation",
-                ),
-            ]
-        return [
-            RecommendedAction(
-                action="Maintain standard customer communication cadence",
-                reason="Low churn probability suggests no immediate intervention is required.",
-                priority=2,
-                expected_impact="Sustain retention",
-            ),
-            RecommendedAction(
-                action="Continue monitoring periodic risk updates",
-                reason="Customer behavior can change over time; periodic checks are recommended.",
-                priority=2,
-                expected_impact="Early detection of changes",
-            ),
-        ]
+        return list(_ACTIONS_BY_RISK[risk_level])
 
     def _compute_key_factors(
         self,
@@ -300,9 +484,15 @@ class PredictionService:
         feature_columns: List[str],
         model_meta: Dict[str, Any],
         top_k: int = 5,
+        contrib_row: Optional[np.ndarray] = None,
+        contrib_groups: Optional[BaseGroups] = None,
     ) -> List[PredictionFactor]:
-        # Prefer per-prediction contributions (tree SHAP via XGBoost pred_contribs)
-        contribs = self._xgb_pred_contribs(pipeline, df, feature_columns, top_k=top_k)
+        # Prefer per-prediction contributions (tree SHAP via XGBoost pred_contribs);
+        # batched requests arrive with them already computed
+        if contrib_row is not None and contrib_groups is not None:
+            contribs = self._factors_from_contribs(contrib_row, contrib_groups, top_k=top_k)
+        else:
+            contribs = self._xgb_pred_contribs(pipeline, df, feature_columns, top_k=top_k)
         if contribs:
             return contribs
 
@@ -332,43 +522,39 @@ class PredictionService:
         feature_columns: List[str],
         top_k: int = 5,
     ) -> List[PredictionFactor]:
-        try:
-            pre = pipeline.named_steps.get("preprocess")
-            model = pipeline.named_steps.get("model")
-        except Exception:
-            return []
-        if pre is None or model is None:
+        lm = loaded_model(pipeline)
+        if lm is None or lm.feature_names is None:
             return []
+        groups = lm.base_groups or group_base_features(base_feature_names(lm.feature_names, feature_columns))
 
         try:
-            X_trans = pre.transform(df)
-            feature_names = list(pre.get_feature_names_out())
+            X_trans = lm.pre.transform(df)
+            row = lm.booster.predict(inference_dmatrix(X_trans), pred_contribs=True, iteration_range=lm.iteration_range)[0]
         except Exception:
             return []
 
-        try:
-            booster = model.get_booster()
-        except Exception:
-            return []
-
-        try:
-            dmat = DMatrix(X_trans, feature_names=feature_names)
-            contribs = booster.predict(dmat, pred_contribs=True)
-            row = contribs[0]
-        except Exception:
-            return []
+        return self._factors_from_contribs(row, groups, top_k=top_k)
 
-        if len(row) <= 1:
-            return []
+    def _factors_from_contribs(
+        self,
+        row: Any,
+        groups: BaseGroups,
+        top_k: int = 5,
+    ) -> List[PredictionFactor]:
+        group_ids, base_names = groups
+        row = np.asarray(row, dtype=np.float64)
         # Last term is bias
-        feature_contribs = row[:-1]
+        if row.shape[0] <= 1 or row.shape[0] - 1 != group_ids.shape[0]:
+            return []
 
-        aggregated: Dict[str, float] = {}
-        for name, val in zip(feature_names, feature_contribs):
-            base = self._map_base_feature(name, feature_columns)
-            aggregated[base] = aggregated.get(base, 0.0) + float(val)
+        # Sum contributions per base column, then rank only the top_k by magnitude
+        aggregated = np.bincount(group_ids, weights=row[:-1], minlength=len(base_names))
+        magnitude = np.abs(aggregated)
+        k = min(top_k, magnitude.shape[0])
+        top = np.argpartition(-magnitude, k - 1)[:k] if k < magnitude.shape[0] else np.arange(k)
+        top = top[np.lexsort((top, -magnitude[top]))]  # ties keep first-seen order
+        ranked = [(base_names[i], float(aggregated[i])) for i in top]
 
-        ranked = sorted(aggregated.items(), key=lambda x: abs(x[1]), reverse=True)[:top_k]
         factors: List[PredictionFactor] = []
         for feat, contrib in ranked:
             direction = "increases_risk" if contrib >= 0 else "decreases_risk"
@@ -381,13 +567,3 @@ class PredictionService:
                 )
             )
         return factors
-
-    def _map_base_feature(self, name: str, feature_columns: List[str]) -> str:
-        base = name.split("__", 1)[-1]
-        if base in feature_columns:
-            return base
-        # Prefer longest prefix match (helps one-hot encoded features)
-        for feat in sorted(feature_columns, key=len, reverse=True):
-            if base.startswith(f"{feat}_") or base.startswith(f"{feat}=") or base.startswith(f"{feat}__"):
-                return feat
-        return base.split("_", 1)[0] if "_" in base else base
@@ -36,8 +36,9 @@ class SchemaService:
             for f in schema_fields:
                 if not isinstance(f, dict) or "name" not in f:
                     continue
+                # Written by the trainer; the route's response_model validates the output
                 fields.append(
-                    SchemaField(
+                    SchemaField.model_construct(
                         name=str(f.get("name")),
                         dtype=str(f.get("dtype") or "string"),
                         required=bool(f.get("required", True)),
@@ -49,7 +50,7 @@ class SchemaService:
         else:
             # Fallback: basic schema from feature_columns
             for name in feature_columns:
-                fields.append(SchemaField(name=name, dtype="string", required=True))
+                fields.append(SchemaField.model_construct(name=name, dtype="string", required=True))
 
         if not target_column or not feature_columns:
             raise AppError(
@@ -11,7 +11,7 @@ from app.core.logging import get_logger
 from app.core.errors import AppError
 from app.ml.metrics import format_metrics
 from app.ml.trainer import train_xgb_pipeline
-from app.schemas.common import ConfusionMatrix, FeatureImportance
+from app.schemas.common import ConfusionMatrix, FeatureImportance, NumericMetric
 from app.schemas.training import TrainRequest, TrainResponse, TrainingMetrics
 from app.services.insights_service import InsightsService
 from app.storage.dataset_store import DatasetStore
@@ -27,6 +27,7 @@ class TrainingService:
     dataset_store: DatasetStore
     model_store: ModelStore
     metadata_store: MetadataStore
+    insights_service: InsightsService
 
     def _train_model(self, req: TrainRequest, progress_cb: Optional[Callable[[int, str], None]] = None) -> TrainResponse:
         def _emit(pct: int, msg: str) -> None:
@@ -101,8 +102,12 @@ class TrainingService:
                 details={"supported": ["xgboost"], "received": model_name},
             )
 
-        X = df[feature_columns].copy()
-        y = df[target_column].copy()
+        # The frame is freshly loaded and owned here; column selection is enough (no defensive copy).
+        # Drop the full frame so only the selected columns stay alive during training.
+        rows, cols = int(df.shape[0]), int(df.shape[1])
+        X = df[feature_columns]
+        y = df[target_column]
+        del df
 
         try:
             _emit(20, "Preparing training data")
@@ -114,6 +119,9 @@ class TrainingService:
                 test_size=self.settings.test_size,
                 progress_cb=progress_cb,
                 progress_range=(30, 90),
+                n_jobs=self.settings.xgb_n_jobs,
+                device=self.settings.xgb_device,
+                early_stopping_rounds=self.settings.xgb_early_stopping_rounds,
             )
         except AppError:
             raise
@@ -139,15 +147,19 @@ class TrainingService:
 
         # Build response metrics
         _emit(96, "Building metrics")
+        # Values below are produced internally and already typed; model_construct skips
+        # re-validation (the response_model still validates the final payload).
         metrics_dict = format_metrics(trained.metrics)
-        metrics = TrainingMetrics(**metrics_dict)
+        metrics = TrainingMetrics.model_construct(
+            **{k: NumericMetric.model_construct(**v) if isinstance(v, dict) else v for k, v in metrics_dict.items()}
+        )
 
-        cm = ConfusionMatrix(labels=["0", "1"], matrix=trained.confusion_matrix)
+        cm = ConfusionMatrix.model_construct(labels=["0", "1"], matrix=trained.confusion_matrix)
 
-        feature_importance = [
-            FeatureImportance(feature=f, importance=float(w))
-            for f, w in trained.feature_importance
+        feature_importance_dicts = [
+            {"feature": f, "importance": float(w)} for f, w in trained.feature_importance
         ]
+        feature_importance = [FeatureImportance.model_construct(**fi) for fi in feature_importance_dicts]
 
         # Persist metadata needed for /schema and /predict (survives restarts)
         _emit(98, "Writing model metadata")
@@ -161,12 +173,12 @@ class TrainingService:
                 "upload_id": req.upload_id,
                 "test_size": float(self.settings.test_size),
                 "random_seed": int(self.settings.random_seed),
-                "rows": int(df.shape[0]),
-                "cols": int(df.shape[1]),
+                "rows": rows,
+                "cols": cols,
             },
             "schema": trained.schema,  # JSON-serializable
             "metrics": metrics_dict,
-            "feature_importance": [fi.model_dump() for fi in feature_importance],
+            "feature_importance": feature_importance_dicts,
         }
         self.metadata_store.write_model_metadata(model_id, model_metadata)
 
@@ -175,21 +187,13 @@ class TrainingService:
 
         _emit(99, "Generating dataset summary")
         try:
-            insights = InsightsService(
-                settings=self.settings,
-                dataset_store=self.dataset_store,
-                metadata_store=self.metadata_store,
-                model_store=self.model_store,
-            )
-            dataset_summary = insights.build_dataset_summary(req.upload_id)
-            prep = self.metadata_store.read_preprocess_metadata(req.upload_id) or {}
-            prep["dataset_summary"] = dataset_summary.model_dump()
-            self.metadata_store.write_preprocess_metadata(req.upload_id, prep)
+            # Also caches the summary in preprocess metadata
+            self.insights_service.build_dataset_summary(req.upload_id, prep=prep)
         except Exception:
             logger.warning("dataset_summary_failed", extra={"upload_id": req.upload_id})
 
         _emit(100, "Training complete")
-        return TrainResponse(
+        return TrainResponse.model_construct(
             model_id=model_id,
             model_name=model_name,
             target_column=target_column,
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import csv as pacsv
+from pyarrow import json as pajson
 from fastapi import UploadFile
 from starlette import status
 
@@ -12,6 +16,75 @@ from app.core.config import Settings
 from app.core.errors import AppError
 from app.utils.files import atomic_write_stream, safe_join
 
+# 8 MiB blocks give the Arrow CSV reader enough work per thread on typical uploads
+_CSV_BLOCK_SIZE = 8 << 20
+
+# Parquet layout for upload/processed copies: zstd + dictionary pages decode quickly on
+# column-subset scans, and ~128K-row groups with statistics let readers skip groups.
+_PARQUET_WRITE_OPTIONS = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "use_dictionary": True,
+    "row_group_size": 128 * 1024,
+    "data_page_size": 1 << 20,
+    "write_statistics": True,
+}
+
+
+def _read_csv_arrow(path: Path) -> pa.Table:
+    """
+    Parse CSV with Arrow's multithreaded tokenizer. Options mirror pandas.read_csv where
+    it matters downstream: empty strings become nulls and date/time-like text stays text.
+    """
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=_CSV_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(strings_can_be_null=True, timestamp_parsers=[]),
+    )
+    return _temporal_as_text(table)
+
+
+def _temporal_as_text(table: pa.Table) -> pa.Table:
+    for i, field in enumerate(table.schema):
+        if pa.types.is_temporal(field.type):
+            # ISO dates/times cast back to the same text pandas would have kept
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table
+
+
+def _is_json_lines(path: Path) -> bool:
+    # Newline-delimited records: the first two non-empty lines are each a complete object.
+    # Arrays and pretty-printed/column-oriented documents stay with pandas.
+    lines: List[bytes] = []
+    with open(path, "rb") as f:
+        for raw in f:
+            line = raw.strip()
+            if line:
+                lines.append(line)
+                if len(lines) == 2:
+                    break
+    return len(lines) == 2 and all(ln.startswith(b"{") and ln.endswith(b"}") for ln in lines)
+
+
+def _read_json(path: Path) -> pd.DataFrame:
+    if _is_json_lines(path):
+        try:
+            table = pajson.read_json(path, read_options=pajson.ReadOptions(use_threads=True))
+            return _temporal_as_text(table).to_pandas(self_destruct=True, split_blocks=True)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return pd.read_json(path, lines=True)
+    # Support JSON records-style or array style
+    return pd.read_json(path, orient=None)
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    # Falls back to pandas for inputs Arrow rejects
+    try:
+        table = _read_csv_arrow(path)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pd.read_csv(path)
+    return table.to_pandas(self_destruct=True, split_blocks=True)
+
 
 @dataclass(frozen=True)
 class DatasetStore:
@@ -62,10 +135,31 @@ class DatasetStore:
         # Very defensive: only allow known extensions
         ext = path.suffix.lower()
         if ext == ".csv":
-            return pd.read_csv(path)
+            return _read_csv(path)
+        if ext == ".json":
+            return _read_json(path)
+        raise AppError(
+            "Unsupported dataset format on server.",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            code="unsupported_dataset_format",
+            details={"path": str(path)},
+        )
+
+    def load_table(self, path: Path) -> pa.Table:
+        """
+        Load an upload (raw CSV/JSON or its Parquet copy) as an Arrow table, for
+        steps that only filter and re-write rows without needing pandas.
+        """
+        ext = path.suffix.lower()
+        if ext == ".parquet":
+            return pq.read_table(path, memory_map=True)
+        if ext == ".csv":
+            try:
+                return _read_csv_arrow(path)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                return pa.Table.from_pandas(pd.read_csv(path), preserve_index=False)
         if ext == ".json":
-            # Support JSON records-style or array style
-            return pd.read_json(path, orient=None)
+            return pa.Table.from_pandas(_read_json(path), preserve_index=False)
         raise AppError(
             "Unsupported dataset format on server.",
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -73,9 +167,20 @@ class DatasetStore:
             details={"path": str(path)},
         )
 
+    def save_upload_parquet(self, upload_id: str, df: pd.DataFrame) -> Path:
+        # Columnar copy of the parsed upload so preprocess doesn't re-parse CSV/JSON
+        dest = safe_join(Path(self.settings.uploads_dir), f"{upload_id}.parquet")
+        df.to_parquet(dest, engine="pyarrow", index=False, **_PARQUET_WRITE_OPTIONS)
+        return dest
+
     def save_processed(self, upload_id: str, df: pd.DataFrame) -> Path:
         dest = safe_join(Path(self.settings.processed_dir), f"{upload_id}.parquet")
-        df.to_parquet(dest, index=False)
+        df.to_parquet(dest, engine="pyarrow", index=False, **_PARQUET_WRITE_OPTIONS)
+        return dest
+
+    def save_processed_table(self, upload_id: str, table: pa.Table) -> Path:
+        dest = safe_join(Path(self.settings.processed_dir), f"{upload_id}.parquet")
+        pq.write_table(table, dest, **_PARQUET_WRITE_OPTIONS)
         return dest
 
     def load_processed_dataframe(self, path: Path) -> pd.DataFrame:
@@ -86,7 +191,23 @@ class DatasetStore:
                 code="invalid_processed_format",
                 details={"path": str(path)},
             )
-        return pd.read_parquet(path)
+        # Memory-mapped read; self_destruct/split_blocks let Arrow hand buffers over column by column
+        table = pq.read_table(path, memory_map=True, use_threads=True)
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+
+    def open_processed(self, path: Path) -> pq.ParquetFile:
+        """
+        Memory-mapped handle on a processed dataset, for schema inspection and
+        column-subset reads (use as a context manager to release the mapping).
+        """
+        if path.suffix.lower() != ".parquet":
+            raise AppError(
+                "Processed dataset must be parquet.",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                code="invalid_processed_format",
+                details={"path": str(path)},
+            )
+        return pq.ParquetFile(pa.memory_map(str(path), "r"))
 
     def safe_delete(self, path: Path) -> None:
         try:
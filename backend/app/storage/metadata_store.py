@@ -1,14 +1,63 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from starlette import status
 
 from app.core.config import Settings
 from app.core.errors import AppError
-from app.utils.files import atomic_read_json, atomic_write_json, safe_join
+from app.utils.files import atomic_read_json, atomic_write_json, ensure_dir, safe_join
+
+# Per-file writer locks, striped by path so writes to different uploads/models never contend.
+# Readers take no lock: files are replaced atomically, so a read sees one whole version.
+_LOCK_STRIPES = 64
+_LOCKS = tuple(threading.RLock() for _ in range(_LOCK_STRIPES))
+
+
+def _lock_for(path: Path) -> "threading.RLock":
+    return _LOCKS[hash(str(path)) & (_LOCK_STRIPES - 1)]
+
+# Metadata is written once and read many times (model metadata on every /predict).
+# Parsed dicts are cached per file (path -> (mtime_ns, size, data)) and must be treated
+# as read-only by callers. Writes through this store drop the entry for their path.
+_META_CACHE_SIZE = 256
+_META_CACHE: "OrderedDict[str, Tuple[int, int, Dict[str, Any]]]" = OrderedDict()
+_META_CACHE_LOCK = threading.Lock()
+
+
+def _read_cached(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = str(path)
+    with _META_CACHE_LOCK:
+        hit = _META_CACHE.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            _META_CACHE.move_to_end(key)
+            return hit[2]
+
+    data = atomic_read_json(path)
+    if data is not None:
+        with _META_CACHE_LOCK:
+            _META_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+            _META_CACHE.move_to_end(key)
+            while len(_META_CACHE) > _META_CACHE_SIZE:
+                _META_CACHE.popitem(last=False)
+    return data
+
+
+def _write(path: Path, data: Dict[str, Any]) -> None:
+    # Serialized with read-modify-write updates of the same file
+    with _lock_for(path):
+        atomic_write_json(path, data)
+    # mtime granularity can be coarse; don't rely on the stat key alone after a rewrite
+    with _META_CACHE_LOCK:
+        _META_CACHE.pop(str(path), None)
 
 
 @dataclass(frozen=True)
@@ -21,11 +70,11 @@ class MetadataStore:
 
     def write_upload_metadata(self, upload_id: str, data: Dict[str, Any]) -> None:
         path = self._upload_meta_path(upload_id)
-        atomic_write_json(path, data)
+        _write(path, data)
 
     def read_upload_metadata(self, upload_id: str) -> Optional[Dict[str, Any]]:
         path = self._upload_meta_path(upload_id)
-        return atomic_read_json(path)
+        return _read_cached(path)
 
     # ---- Preprocess metadata ----
     def _preprocess_meta_path(self, upload_id: str) -> Path:
@@ -33,11 +82,26 @@ class MetadataStore:
 
     def write_preprocess_metadata(self, upload_id: str, data: Dict[str, Any]) -> None:
         path = self._preprocess_meta_path(upload_id)
-        atomic_write_json(path, data)
+        _write(path, data)
 
     def read_preprocess_metadata(self, upload_id: str) -> Optional[Dict[str, Any]]:
         path = self._preprocess_meta_path(upload_id)
-        return atomic_read_json(path)
+        return _read_cached(path)
+
+    def update_preprocess_metadata(self, upload_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Merge keys into existing preprocess metadata.
+        Returns the merged dict, or None if the upload was never preprocessed.
+        """
+        path = self._preprocess_meta_path(upload_id)
+        with _lock_for(path):
+            # Uncached read: the merged dict is modified and returned to the caller
+            data = atomic_read_json(path)
+            if data is None:
+                return None
+            data.update(updates)
+            _write(path, data)
+            return data
 
     # ---- Model metadata ----
     def _model_meta_path(self, model_id: str) -> Path:
@@ -45,18 +109,17 @@ class MetadataStore:
 
     def write_model_metadata(self, model_id: str, data: Dict[str, Any]) -> None:
         path = self._model_meta_path(model_id)
-        atomic_write_json(path, data)
+        _write(path, data)
 
     def read_model_metadata(self, model_id: str) -> Optional[Dict[str, Any]]:
         path = self._model_meta_path(model_id)
-        return atomic_read_json(path)
+        return _read_cached(path)
 
     # ---- Generic helpers (optional) ----
     def ensure_metadata_dirs(self) -> None:
         """
         Ensure metadata subfolders exist.
-        Called indirectly by atomic_write_json() which creates parents, but kept for clarity.
+        Called at startup so later writes find them in the ensured-dirs set.
         """
         for sub in ("uploads", "preprocess", "models"):
-            p = safe_join(Path(self.settings.metadata_dir), sub)
-            p.mkdir(parents=True, exist_ok=True)
+            ensure_dir(safe_join(Path(self.settings.metadata_dir), sub))
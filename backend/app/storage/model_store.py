@@ -1,28 +1,66 @@
 from __future__ import annotations
 
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Tuple
 
 import joblib
+from sklearn.pipeline import Pipeline
 from starlette import status
+from xgboost import XGBClassifier
 
 from app.core.config import Settings
 from app.core.errors import AppError
 from app.utils.files import safe_join
 
+# Loading a pipeline costs far more than scoring one row, so loaded artifacts are kept
+# in a small LRU: path -> (mtime_ns, size, object). A rewritten file misses on its stat key.
+_MODEL_CACHE_SIZE = 16
+_MODEL_CACHE: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Model arrays are memory-mapped (read-only, shared via the page cache across workers).
+# Not on Windows: a mapped file can't be deleted while cached, which breaks /admin/reset.
+_MMAP_MODE = None if os.name == "nt" else "r"
+
 
 @dataclass(frozen=True)
 class ModelStore:
     settings: Settings
 
     def _model_path(self, model_id: str) -> Path:
+        # Whole-pipeline pickle (older artifacts; also used for non-XGBoost pipelines)
         return safe_join(Path(self.settings.models_dir), f"{model_id}.joblib")
 
+    def _booster_path(self, model_id: str) -> Path:
+        return safe_join(Path(self.settings.models_dir), f"{model_id}.ubj")
+
+    def _preprocess_path(self, model_id: str) -> Path:
+        return safe_join(Path(self.settings.models_dir), f"{model_id}.preprocess.joblib")
+
     def save_model(self, model_id: str, model_object: Any) -> Path:
-        path = self._model_path(model_id)
+        """
+        Persist a preprocess + XGBoost pipeline as two files: the fitted preprocessor
+        (joblib, uncompressed so its arrays can be memory-mapped on load) and the
+        classifier in XGBoost's native UBJSON format. Anything else is pickled whole,
+        also uncompressed for the same reason.
+        Returns the path of the primary artifact.
+        """
+        steps = getattr(model_object, "named_steps", None) or {}
+        model = steps.get("model")
+        split = len(steps) == 2 and "preprocess" in steps and isinstance(model, XGBClassifier)
         try:
-            joblib.dump(model_object, path)
+            if split:
+                joblib.dump(steps["preprocess"], self._preprocess_path(model_id), compress=0, protocol=5)
+                # Written last: its presence marks a complete split artifact
+                path = self._booster_path(model_id)
+                model.save_model(str(path))
+            else:
+                path = self._model_path(model_id)
+                joblib.dump(model_object, path, compress=0, protocol=5)
         except Exception as e:
             raise AppError(
                 "Failed to persist model artifact",
@@ -33,16 +71,36 @@ class ModelStore:
         return path
 
     def load_model(self, model_id: str) -> Any:
-        path = self._model_path(model_id)
-        if not path.exists():
+        path = self._booster_path(model_id)
+        split = True
+        try:
+            st = path.stat()
+        except OSError:
+            st = None
+        if st is None:
+            path = self._model_path(model_id)
+            split = False
+            try:
+                st = path.stat()
+            except OSError:
+                st = None
+        if st is None:
             raise AppError(
                 "Model artifact not found on server. Please retrain the model.",
                 status_code=status.HTTP_404_NOT_FOUND,
                 code="model_artifact_missing",
                 details={"model_id": model_id},
             )
+
+        key = str(path)
+        with _MODEL_CACHE_LOCK:
+            hit = _MODEL_CACHE.get(key)
+            if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                _MODEL_CACHE.move_to_end(key)
+                return hit[2]
+
         try:
-            return joblib.load(path)
+            model = self._load_split(model_id, path) if split else joblib.load(path, mmap_mode=_MMAP_MODE)
         except Exception as e:
             raise AppError(
                 "Failed to load model artifact",
@@ -50,3 +108,16 @@ class ModelStore:
                 code="model_load_failed",
                 details={"error": str(e)},
             )
+
+        with _MODEL_CACHE_LOCK:
+            _MODEL_CACHE[key] = (st.st_mtime_ns, st.st_size, model)
+            _MODEL_CACHE.move_to_end(key)
+            while len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+                _MODEL_CACHE.popitem(last=False)
+        return model
+
+    def _load_split(self, model_id: str, booster_path: Path) -> Pipeline:
+        preprocess = joblib.load(self._preprocess_path(model_id), mmap_mode=_MMAP_MODE)
+        model = XGBClassifier()
+        model.load_model(str(booster_path))
+        return Pipeline(steps=[("preprocess", preprocess), ("model", model)])
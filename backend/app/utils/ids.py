@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-import uuid
+import os
+import threading
+
+# Per-thread entropy pool for request/trace ids: one os.urandom() call serves many ids.
+_ID_POOL_BYTES = 4096
+_ID_BYTES = 16
+_TRACE_BUF = threading.local()
 
 
 def new_id(prefix: str) -> str:
@@ -8,4 +14,19 @@ def new_id(prefix: str) -> str:
     Create a short, URL-safe-ish identifier.
     Example: mdl_9f3a1c2d0e5b4d7a
     """
-    return f"{prefix}_{uuid.uuid4().hex[:16]}"
+    return f"{prefix}_{os.urandom(8).hex()}"
+
+
+def new_trace_id() -> str:
+    """
+    Create a 32-char hex id for request/trace correlation.
+    Slices from a thread-local urandom buffer instead of building a UUID per call.
+    """
+    buf = getattr(_TRACE_BUF, "buf", b"")
+    pos = getattr(_TRACE_BUF, "pos", 0)
+    if len(buf) - pos < _ID_BYTES:
+        buf = os.urandom(_ID_POOL_BYTES)
+        pos = 0
+        _TRACE_BUF.buf = buf
+    _TRACE_BUF.pos = pos + _ID_BYTES
+    return buf[pos : pos + _ID_BYTES].hex()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.ml.pipeline import build_schema, build_xgb_pipeline, default_n_jobs
+
+
+def _frame(n: int = 60) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "tenure": rng.integers(0, 72, size=n).astype(float),
+            "charges": rng.normal(70.0, 20.0, size=n),
+            "contract": rng.choice(["monthly", "yearly", None], size=n),
+            # More distinct values than the one-hot limit, so this column is hashed
+            "customer_ref": [f"c{i}" if i % 10 else None for i in range(n)],
+        }
+    )
+
+
+def test_build_xgb_pipeline_fits_and_predicts() -> None:
+    X = _frame()
+    y = pd.Series(np.arange(len(X)) % 2)
+
+    pipe, meta = build_xgb_pipeline(X, random_seed=42)
+    assert pipe.named_steps["model"].get_params()["n_jobs"] == default_n_jobs()
+    assert meta["numeric_features"] == ["tenure", "charges"]
+    assert meta["hashed_features"] == ["customer_ref"]
+
+    pipe.fit(X, y)
+    proba = pipe.predict_proba(X.head(5))
+    assert proba.shape == (5, 2)
+    assert np.all((proba >= 0.0) & (proba <= 1.0))
+
+
+def test_build_schema_lists_every_column() -> None:
+    X = _frame()
+    fields = {f["name"]: f for f in build_schema(X).fields}
+    assert list(fields) == list(X.columns)
+    assert fields["contract"]["allowed_values"] == ["monthly", "yearly"]
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app.core.errors import AppError
+from app.ml.trainer import _normalize_target
+
+
+def test_normalize_target_ignores_unused_categories() -> None:
+    y = pd.Series(pd.Categorical([" Yes", "no", "YES"], categories=["Yes", "no", "YES", " Yes", "maybe"]))
+    assert _normalize_target(y).tolist() == [1, 0, 1]
+
+
+def test_normalize_target_rejects_unknown_labels() -> None:
+    with pytest.raises(AppError) as exc:
+        _normalize_target(pd.Series(["yes", "maybe"]))
+    assert exc.value.code == "invalid_target_labels"